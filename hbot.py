@@ -1,17 +1,279 @@
 #!/usr/bin/env python
 from __future__ import absolute_import, division, print_function, unicode_literals
-from textcad import component, element, operation, utility
-from magpie import hardware, bearing, motor, belt, shape
+# component and element are subclassed below, so they have to be imported
+# eagerly. Everything else is only touched inside constructors and is loaded
+# on first use. Without textcad parts can't be constructed, but the queue and
+# fingerprint comparisons still work.
+try:
+    from textcad import component, element
+except ImportError as e:
+    _textcadError = str(e)
+
+    class _Unavailable(object):
+        def __init__(self, *args, **kwargs):
+            raise ImportError(_textcadError)
+
+    class component(object):
+        Element = _Unavailable
+
+    class element(object):
+        Primitive = _Unavailable
 import subprocess
+import shutil
+import importlib
+import argparse
+import csv
+import hashlib
+import errno
+import json
 import copy
+import gc
 import math
+import time
+import sys
+import os
+
+
+class _LazyModule(object):
+    """Module proxy that imports the real module on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+operation = _LazyModule("textcad.operation")
+utility = _LazyModule("textcad.utility")
+hardware = _LazyModule("magpie.hardware")
+bearing = _LazyModule("magpie.bearing")
+motor = _LazyModule("magpie.motor")
+belt = _LazyModule("magpie.belt")
+shape = _LazyModule("magpie.shape")
+#only needed by the sweep, the queue and parallel builds
+multiprocessing = _LazyModule("multiprocessing")
+sqlite3 = _LazyModule("sqlite3")
+threading = _LazyModule("threading")
+socket = _LazyModule("socket")
+inspect = _LazyModule("inspect")
+resource = _LazyModule("resource")
+
+
+def _waitConnections(connections, timeout):
+    try:
+        from multiprocessing.connection import wait
+    except ImportError:
+        return [c for c in connections if c.poll(timeout/len(connections))]
+    return wait(connections, timeout)
+
+#Precompiled vitamin dimensions. The table is recompiled when the version, the
+#magpie version or VITAMIN_FIELDS/VITAMIN_SIZES change.
+VITAMIN_TABLE_VERSION = 1
+VITAMIN_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "vitamins.json")
+VITAMIN_FIELDS = {
+    "hardware.Nut": ["width", "height", "diameter"],
+    "hardware.LockNut": ["width", "height", "diameter"],
+    "hardware.CapScrew": ["outerDiameter", "headDiameter"],
+    "belt.TimingBelt": ["width", "height"],
+    "bearing.BallBearing": ["innerDiameter", "outerDiameter", "width"],
+    "bearing.LinearBallBearing": ["innerDiameter", "outerDiameter",
+                                  "length"],
+    "motor.Stepper": ["width"],
+}
+VITAMIN_SIZES = {
+    "hardware.Nut": ["M3", "M4", "M5"],
+    "hardware.LockNut": ["M3", "M4", "M5"],
+    "hardware.CapScrew": ["M3", "M4", "M5"],
+    "belt.TimingBelt": ["GT2"],
+    "bearing.BallBearing": ["605zz", "624zz", "625zz"],
+    "bearing.LinearBallBearing": ["LM8UU"],
+    "motor.Stepper": ["GenericNEMA17"],
+}
+#Keyword arguments that change the geometry of a vitamin. Those always
+#construct the real magpie object.
+VITAMIN_GEOMETRY_ARGS = ["negative", "negativeLength",
+                         "radiusTolerance", "lengthTolerance"]
+_vitaminTable = None
+
+
+class VitaminRecord(object):
+    """Dimensions of a vitamin, as read from the vitamin table"""
+    def __init__(self, **dimensions):
+        self.__dict__.update(dimensions)
+
+    def __repr__(self):
+        return "VitaminRecord(%s)" % ", ".join(
+            "%s=%r" % item for item in sorted(self.__dict__.items()))
+
+
+def _magpieVitamin(kind, size, **kwargs):
+    moduleName, className = kind.split(".")
+    return getattr(globals()[moduleName], className)(size=size, **kwargs)
+
+
+def compileVitaminTable(path=VITAMIN_TABLE, sizes=VITAMIN_SIZES):
+    """Build the vitamin table from magpie and write it to path.
+
+    Sizes magpie can't construct, or that lack a field, are left out and
+    reported on stderr; vitamin() looks those up in magpie.
+    """
+    vitamins = {}
+    for kind, kindSizes in sizes.items():
+        vitamins[kind] = {}
+        for size in kindSizes:
+            try:
+                obj = _magpieVitamin(kind, size)
+                dimensions = dict((f, getattr(obj, f))
+                                  for f in VITAMIN_FIELDS[kind])
+            except Exception as e:
+                print("vitamin table: skipped %s %s: %s: %s" %
+                      (kind, size, type(e).__name__, e), file=sys.stderr)
+                continue
+            dimensions["size"] = size
+            vitamins[kind][size] = dimensions
+    table = dict(_vitaminTableStamp(), vitamins=vitamins)
+    #write then rename, so concurrent readers never see a partial table
+    partial = "%s.%d" % (path, os.getpid())
+    try:
+        with open(partial, "w") as f:
+            json.dump(table, f, indent=1, sort_keys=True)
+        os.rename(partial, path)
+    except (IOError, OSError) as e:
+        print("vitamin table not written: %s" % e, file=sys.stderr)
+    return table
+
+
+def _magpieVersion():
+    try:
+        from importlib import metadata
+        return metadata.version("magpie")
+    except Exception:
+        try:
+            return getattr(importlib.import_module("magpie"), "__version__",
+                           None)
+        except ImportError:
+            return None
+
+
+def _vitaminTableStamp():
+    """What a vitamin table on disk has to match to be used"""
+    return {"version": VITAMIN_TABLE_VERSION, "magpie": _magpieVersion(),
+            "schema": _hash([VITAMIN_FIELDS, VITAMIN_SIZES])}
+
+
+def loadVitaminTable(path=VITAMIN_TABLE, allowCompile=True):
+    """Load the vitamin table in one read, compiling it first if needed"""
+    global _vitaminTable
+    stamp = _vitaminTableStamp()
+    table = None
+    if os.path.exists(path):
+        with open(path) as f:
+            table = json.load(f)
+        if any(table.get(k) != v for k, v in stamp.items()):
+            table = None
+    if table is None:
+        if not allowCompile:
+            raise ValueError("no current vitamin table at %s" % path)
+        table = compileVitaminTable(path)
+    _vitaminTable = table["vitamins"]
+    return _vitaminTable
+
+
+def _useVitaminTable(vitamins):
+    """Worker initializer: use the vitamin table loaded by the parent, which
+    spawned and forkserver workers don't inherit"""
+    global _vitaminTable
+    _vitaminTable = vitamins
+
+
+def vitamin(kind, size, **kwargs):
+    """Returns a vitamin of the given kind ("hardware.Nut", ...) and size.
+
+    When a vitamin table is loaded and no geometry is requested, a
+    VitaminRecord holding the dimensions is returned instead of the magpie
+    object. Other keyword arguments are set as attributes on the record.
+    """
+    if _vitaminTable is not None and \
+            not any(arg in kwargs for arg in VITAMIN_GEOMETRY_ARGS):
+        dimensions = _vitaminTable.get(kind, {}).get(size)
+        if dimensions is not None:
+            record = VitaminRecord(**dimensions)
+            record.__dict__.update(kwargs)
+            return record
+    return _magpieVitamin(kind, size, **kwargs)
+
+
+
+class Transform(object):
+    """Immutable placement: a location and a rotation of angle about axis"""
+    __slots__ = ["location", "axis", "angle"]
+
+    def __init__(self, location=(0, 0, 0), axis=(0, 0, 1), angle=0):
+        object.__setattr__(self, "location", tuple(location))
+        object.__setattr__(self, "axis", tuple(axis))
+        object.__setattr__(self, "angle", angle)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Transform is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, Transform) and \
+            (self.location, self.axis, self.angle) == \
+            (other.location, other.axis, other.angle)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.location, self.axis, self.angle))
+
+    def __repr__(self):
+        return "Transform(location=%r, axis=%r, angle=%r)" % (
+            self.location, self.axis, self.angle)
+
+    def __reduce__(self):
+        return (Transform, (self.location, self.axis, self.angle))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @classmethod
+    def of(cls, element):
+        rotation = element.rotation
+        return cls(element.location, rotation.axis, rotation.angle)
+
+    def apply(self, element):
+        """Place element, giving it its own location list and rotation"""
+        element.location = list(self.location)
+        element.rotation = copy.copy(element.rotation)
+        element.rotation.axis = list(self.axis)
+        element.rotation.angle = self.angle
+        return element
+
+
+def placedCopy(element, transform=None):
+    """Copy of element that shares its construction but not its placement"""
+    clone = copy.copy(element)
+    clone.location = copy.copy(element.location)
+    clone.rotation = copy.copy(element.rotation)
+    if transform is not None:
+        transform.apply(clone)
+    return clone
+
 
 class CoreBotConfig():
     def __init__(self,
                  buildVolume = [150, 150, 200],
-                 stepper = ["Generic NEMA17", "Generic NEMA17", "Generic NEMA17"],
+                 stepper = ["GenericNEMA17", "GenericNEMA17", "GenericNEMA17"],
                  linear = ["LM8UU", "LM8UU", "LM8UU"],
-                 bearing = ["605zz", "624zz", None],
+                 bearing = ["625zz", "624zz", None],
                  ):
         self.buildVolume = buildVolume
         self.stepper = stepper
@@ -21,10 +283,17 @@ class CoreBotConfig():
 class CoreBotVitamins():
     def __init__(self,
                  coreBotConfig = None):
-        self.stepper = [motor.Stepper(size=coreBotConfig.stepper[i]) for i in 
-                        coreBotConfig.stepper]
+        self.stepper = [vitamin("motor.Stepper", size)
+                        for size in coreBotConfig.stepper]
 
 class XCarriage(element.Primitive):
+    #(kind, constructor argument giving the size, count): three bearing
+    #holders; seven tabs, four belt clamp holes and the tensioning screw, with
+    #a nut each and a second nut on the tensioning screw
+    VITAMINS = [("bearing.LinearBallBearing", "linearBallBearing", 3),
+                ("hardware.CapScrew", "screw", 12),
+                ("hardware.Nut", "screw", 13)]
+
     def __init__(self,
                  linearBallBearing="LM8UU",
                  screw="M5",
@@ -37,9 +306,9 @@ class XCarriage(element.Primitive):
         self.lb = bearing.LinearBallBearing(size=linearBallBearing,
                                             negative=True,
                                             radiusTolerance=tolerance)
-        self.screw = hardware.CapScrew(size=screw, length=0)
-        self.nut = hardware.Nut(size=screw)
-        self.belt = belt.TimingBelt(size=beltSize, width=beltWidth)
+        self.screw = vitamin("hardware.CapScrew", screw, length=0)
+        self.nut = vitamin("hardware.Nut", screw)
+        self.belt = vitamin("belt.TimingBelt", beltSize, width=beltWidth)
         self.lbHolder = LinearBearingHolder(linearBallBearing=self.lb.size,
                                             useZipTie=False,
                                             radiusTolerance=tolerance)
@@ -75,14 +344,14 @@ class XCarriage(element.Primitive):
 
     def _construction(self):
         #left top bearing holder
-        ltBearingHolder = copy.deepcopy(self.lbHolder)
+        ltBearingHolder = placedCopy(self.lbHolder)
         ltBearingHolder.location = [self.lb.length+ltBearingHolder.wall, 0, ]
 
         #right top bearing holder
-        rtBearingHolder = copy.deepcopy(self.lbHolder)
+        rtBearingHolder = placedCopy(self.lbHolder)
 
         #bottom center bearing holder
-        bcBearingHolder = copy.deepcopy(self.lbHolder)
+        bcBearingHolder = placedCopy(self.lbHolder)
         bcBearingHolder.location = [self.topLength/2-self.bottomLength/2,
                                     self.rodSpacing,
                                     0]
@@ -98,45 +367,37 @@ class XCarriage(element.Primitive):
         top.location = [0, self.lbHolder.width, 0]
 
         #add tabs for mounting stuff
+        tabAngles = [0, 0, 0, 180, 180, -90, 90]
         tabs = []
-        for i in range(0, 7):
-            tabs.append(shape.D(radius=self.tabRadius,
-                               length=self.plateThick,
-                               extension=self.tabRadius+self.lbHolder.wall/2))
-        for idx, tab in enumerate(tabs):
-            if idx in [3, 4]:
+        for idx, angle in enumerate(tabAngles):
+            tab = shape.D(radius=self.tabRadius,
+                          length=self.plateThick,
+                          extension=self.tabRadius+self.lbHolder.wall/2)
+            tab.location = copy.copy(self.mountingHoles[idx])
+            if angle:
                 tab.rotation.axis = [0, 0, 1]
-                tab.rotation.angle = 180
-            hole = element.Hole(radius=self.screw.outerDiameter/2,
-                                height=self.plateThick+0.2,
-                                tolerance=self.tolerance)
-            trap = NutTrap(self.nut)
-            tab.location = self.mountingHoles[idx]
-            trap.location = [self.mountingHoles[idx][0],
-                             self.mountingHoles[idx][1],
-                             self.plateThick-self.nut.height]
-            hole.location = [self.mountingHoles[idx][0],
-                             self.mountingHoles[idx][1],
-                             -0.1]
-            if idx == 1:
-                trap.location[2] = -0.1
-            if idx == 5:
-                tab.rotation.axis = [0, 0, 1]
-                tab.rotation.angle = -90
-                trap.rotation.axis = [0, 0, 1]
-                trap.rotation.angle = 30
-                trap.location[2] = -0.1
-            if idx == 6:
-                tab.rotation.axis = [0, 0, 1]
-                tab.rotation.angle = 90
-                trap.rotation.axis = [0, 0, 1]
-                trap.rotation.angle = 30
-                trap.location[2] = -0.1
+                tab.rotation.angle = angle
+            tabs.append(tab)
+        for idx, tab in enumerate(tabs):
             if idx in [3,4]:
                 tab = operation.Hull([tabs[idx+2], tab])
             if idx in [5,6]:
                 tab = operation.Hull([top, tab])
-            asm = (tab + asm) - (hole + trap)
+            asm = tab + asm
+        #holes and nut traps through the tabs, traps 1, 5 and 6 from below
+        hole = element.Hole(radius=self.screw.outerDiameter/2,
+                            height=self.plateThick+0.2,
+                            tolerance=self.tolerance)
+        holes = HolePattern(hole, [[x, y, -0.1]
+                                   for x, y, z in self.mountingHoles])
+        trapDepth = self.plateThick-self.nut.height
+        trapZ = [trapDepth, -0.1, trapDepth, trapDepth, trapDepth, -0.1, -0.1]
+        trapRotations = [None]*5 + [([0, 0, 1], 30)]*2
+        traps = HolePattern(NutTrap(self.nut),
+                            [[hole[0], hole[1], z]
+                             for hole, z in zip(self.mountingHoles, trapZ)],
+                            trapRotations)
+        asm -= holes + traps
         # Clean the hack hull stuff above
         self.lb.location = [self.topLength/2-self.lb.length/2, 
                             self.rodSpacing+self.lbHolder.width/2,
@@ -162,30 +423,21 @@ class XCarriage(element.Primitive):
                              -0.1]
         asm -= beltSlot
         #subtract nuttraps and holes for belt clamps
-        nuts = [copy.deepcopy(NutTrap(self.nut)) for x in range(0, 4)]
-        nuts[0].location = [self.topLength/2-self.beltClampSpacing/2,
-                            self.lbHolder.width + self.nut.width/2, 0]
-        nuts[1].location = [nuts[0].location[0]+self.beltClampSpacing,
-                            nuts[0].location[1], 0]
-        nuts[2].location = copy.copy(nuts[0].location)
-        nuts[2].location[1] += self.beltClampHoleSpacing
-        nuts[3].location = copy.copy(nuts[1].location)
-        nuts[3].location[1] += self.beltClampHoleSpacing
-        holes = [copy.deepcopy(element.Hole()) for x in range(0, 4)]
-        for idx, nut in enumerate(nuts):
-            holes[idx].tolerance = self.tolerance
-            holes[idx].location = copy.deepcopy(nut.location)
-            nut.location[2] = self.plateThick - self.nut.height +0.1
-            holes[idx].radius = self.nut.diameter/2
-            holes[idx].height = self.plateThick + 0.3
-        for objs in nuts:
-            # shift everything down for clean rendering
-            objs.location[2] -= 0.1
-            asm -= objs
-        for objs in holes:
-            # shift everything down for clean rendering
-            objs.location[2] -= 0.1
-            asm -= objs
+        clampX = self.topLength/2-self.beltClampSpacing/2
+        clampY = self.lbHolder.width + self.nut.width/2
+        clampXY = [[clampX, clampY],
+                   [clampX+self.beltClampSpacing, clampY],
+                   [clampX, clampY+self.beltClampHoleSpacing],
+                   [clampX+self.beltClampSpacing, clampY+self.beltClampHoleSpacing]]
+        clampHole = element.Hole(radius=self.nut.diameter/2,
+                                 height=self.plateThick+0.3,
+                                 tolerance=self.tolerance)
+        # shifted down 0.1 for clean rendering
+        nuts = HolePattern(NutTrap(self.nut),
+                           [[x, y, self.plateThick-self.nut.height]
+                            for x, y in clampXY])
+        holes = HolePattern(clampHole, [[x, y, -0.1] for x, y in clampXY])
+        asm -= nuts + holes
         #subtract tensioning nutslots
         nutSlot1 = NutSlot(nut=self.nut, extension=self.plateThick)
         nutSlot1.rotation.angle = 90
@@ -204,6 +456,13 @@ class XCarriage(element.Primitive):
 
 
 class YCarriage(element.Primitive):
+    VITAMINS = [("bearing.LinearBallBearing", "linearBallBearing", 2),
+                ("bearing.BallBearing", "ballBearing", 2),
+                ("hardware.CapScrew", "bearingScrew", 2),
+                ("hardware.Nut", "bearingScrew", 2),
+                ("hardware.CapScrew", "plateScrew", 2),
+                ("hardware.LockNut", "plateScrew", 2)]
+
     def __init__(self, 
                  linearBallBearing="LM8UU",
                  plateScrew="M3",
@@ -218,14 +477,14 @@ class YCarriage(element.Primitive):
                  endstopDepth=9
                  ):
         element.Primitive.__init__(self, name="ycarriage")
-        self.lb = bearing.LinearBallBearing(size=linearBallBearing)
-        self.bearingScrew = hardware.CapScrew(size=bearingScrew, length=0)
-        self.bearingNut = hardware.Nut(size=bearingScrew)
-        self.plateScrew = hardware.CapScrew(size=plateScrew, length=0)
-        self.plateNut = hardware.LockNut(size=plateScrew)
+        self.lb = vitamin("bearing.LinearBallBearing", linearBallBearing)
+        self.bearingScrew = vitamin("hardware.CapScrew", bearingScrew, length=0)
+        self.bearingNut = vitamin("hardware.Nut", bearingScrew)
+        self.plateScrew = vitamin("hardware.CapScrew", plateScrew, length=0)
+        self.plateNut = vitamin("hardware.LockNut", plateScrew)
         self.xcar = xCarriage
-        self.belt = belt.TimingBelt(size=beltSize)
-        self.bearing = bearing.BallBearing(size=ballBearing)
+        self.belt = vitamin("belt.TimingBelt", beltSize)
+        self.bearing = vitamin("bearing.BallBearing", ballBearing)
         self.bearingMount = bearingMount
         self.tolerance = 0.05
         self.endstop = endstop
@@ -243,9 +502,9 @@ class YCarriage(element.Primitive):
         self.construction = self._construction()
 
     def _construction(self):
-        lbHold1 = copy.deepcopy(self.lbHolder)
+        lbHold1 = placedCopy(self.lbHolder)
         lbHold1.location=[-lbHold1.wall/2, -lbHold1.width/2, self.lbHolderZ]
-        lbHold2 = copy.deepcopy(self.lbHolder)
+        lbHold2 = placedCopy(self.lbHolder)
         lbHold2.location=[-lbHold2.length+lbHold2.wall/2, -lbHold2.width/2, self.lbHolderZ]
         bearingBase = element.Cube([lbHold1.length*2-lbHold1.wall, lbHold1.width, self.lbHolderZ])
         bearingBase.location = [-lbHold2.length+lbHold2.wall/2, -lbHold2.width/2, 0]
@@ -273,7 +532,7 @@ class YCarriage(element.Primitive):
             endstopHole1 = element.Hole(radius=1.2, height=self.rodSpacing/2)
             endstopHole1.rotation.angle = -90
             endstopHole1.rotation.axis = [1, 0, 0]
-            endstopHole2 = copy.deepcopy(endstopHole1)
+            endstopHole2 = placedCopy(endstopHole1)
             endstopHole1.location = [-self.endstopHoleSpacing/2,
                                      self.rodSpacing/4,
                                      self.endstopDepth]
@@ -290,7 +549,7 @@ class YCarriage(element.Primitive):
         hole1.location = [self.bearingSpacing/2,
                           lbHold1.width/2+0.1,
                           self.bearing.outerDiameter/2]
-        hole2 = copy.deepcopy(hole1)
+        hole2 = placedCopy(hole1)
         hole2.location = [-self.bearingSpacing/2,
                           lbHold1.width/2+0.1,
                           self.bearing.outerDiameter/2]
@@ -300,7 +559,7 @@ class YCarriage(element.Primitive):
         cap1.rotation.angle = -90
         cap1.rotation.axis = [1,0,0]
         cap1.location = [self.bearingSpacing/2, lbHold1.width/2, self.bearing.outerDiameter/2]
-        cap2 = copy.deepcopy(cap1)
+        cap2 = placedCopy(cap1)
         cap2.rotation.angle = -90
         cap2.rotation.axis = [1,0,0]
         cap2.location = [-self.bearingSpacing/2, lbHold1.width/2, self.bearing.outerDiameter/2]
@@ -333,7 +592,7 @@ class YCarriage(element.Primitive):
         rodHole1 = element.Hole(radius=self.rodDiameter/2,
                                 height=self.rodDepth+0.1,
                                 tolerance=self.tolerance)
-        rodHole2 = copy.deepcopy(rodHole1)
+        rodHole2 = placedCopy(rodHole1)
         rodHole1.location = [0, self.rodSpacing/2, -0.1]
         rodHole2.location = [0, -self.rodSpacing/2, -0.1]
         asm -= rodHole1 + rodHole2
@@ -343,9 +602,9 @@ class YCarriage(element.Primitive):
         plateNut2 = NutTrap(self.plateNut)
         plateNut2.location = [0, -self.lb.outerDiameter/2-self.plateNut.diameter/2, -0.1]
         plateHole1 = element.Hole(radius=self.plateNut.diameter/2, height=self.lbHolderZ+self.lbHolder.height+0.2)
-        plateHole1.location = plateNut1.location
-        plateHole2 = copy.deepcopy(plateHole1)
-        plateHole2.location = plateNut2.location
+        plateHole1.location = copy.copy(plateNut1.location)
+        plateHole2 = placedCopy(plateHole1)
+        plateHole2.location = copy.copy(plateNut2.location)
         asm -= plateNut1 + plateNut2 + plateHole1 + plateHole2
         return asm
 
@@ -357,21 +616,21 @@ class YCarriagePlate(element.Primitive):
         lbHolder = ycar.lbHolder
         height = lbHolder.lb.outerDiameter - lbHolder.clampFactor
         lbCap1 = LinearBearingHolderCap(ycar.lbHolder)
-        lbCap2 = copy.deepcopy(lbCap1)
+        lbCap2 = placedCopy(lbCap1)
         lbCap1.location = [-lbHolder.wall/2, -lbHolder.width/2, 0]
         lbCap2.location = [-lbHolder.length+lbHolder.wall/2, -lbHolder.width/2, 0]
         d1 = shape.D(radius=ycar.rodEncasementDiameter/2,
                     length=height,
                     extension=lbHolder.wall/2)
         d1.location=[0, -ycar.lb.outerDiameter/2-ycar.plateNut.diameter/2, 0]
-        d2 = copy.deepcopy(d1)
+        d2 = placedCopy(d1)
         d2.location=[0, ycar.lb.outerDiameter/2+ycar.plateNut.diameter/2, 0]
         d2.rotation.angle = 180
         d2.rotation.axis = [0, 0, 1]
         h1 = element.Hole(radius=ycar.plateNut.diameter/2, height=height+0.2)
-        h1.location = d1.location
+        h1.location = copy.copy(d1.location)
         h2 = element.Hole(radius=ycar.plateNut.diameter/2, height=height+0.2)
-        h2.location = d2.location
+        h2.location = copy.copy(d2.location)
         shaft = element.Hole(radius=ycar.lb.innerDiameter/2+1,
                              height=lbHolder.length*2)
         shaft.center = [True, True, True]
@@ -384,6 +643,9 @@ class YCarriagePlate(element.Primitive):
 
 
 class MotorMount(element.Primitive):
+    VITAMINS = [("motor.Stepper", "stepper", 1),
+                ("WoodScrew", "holeDiameter", 4)]
+
     def __init__(self, rodDiameter=8,
                  mountLength=38,
                  stepper="GenericNEMA17",
@@ -396,11 +658,11 @@ class MotorMount(element.Primitive):
                  holeDiameter=3.5):
         element.Primitive.__init__(self, name="motormount")
         #Used Elements
-        self.belt = belt.TimingBelt(size=beltSize)
-        self.bearing = bearing.BallBearing(size=bearingSize)
-        self.lb = bearing.LinearBallBearing(size=linearBearing)
+        self.belt = vitamin("belt.TimingBelt", beltSize)
+        self.bearing = vitamin("bearing.BallBearing", bearingSize)
+        self.lb = vitamin("bearing.LinearBallBearing", linearBearing)
         self.beltSeperation = self.bearing.outerDiameter
-        self.nut = hardware.Nut(size=nutSize)
+        self.nut = vitamin("hardware.Nut", nutSize)
         self.yRodMount = YRodMount(rodDiameter=8,
                                    mountLength=mountLength,
                                    stepper=stepper,
@@ -434,9 +696,9 @@ class MotorMount(element.Primitive):
         d2.location[0] += self.stepper.width-mount.tabRadius*2
         clear1 = element.Cylinder(radius=mount.tabRadius,
                                   height=mount.plateThick+0.2)
-        clear2 = copy.deepcopy(clear1)
-        clear1.location = mount.mountingHoles[0]
-        clear2.location = mount.mountingHoles[2]
+        clear2 = placedCopy(clear1)
+        clear1.location = copy.copy(mount.mountingHoles[0])
+        clear2.location = copy.copy(mount.mountingHoles[2])
         motorPlate = operation.Hull([d1, d2])
         motorPlate -= clear1 + clear2
         asm += motorPlate
@@ -446,6 +708,12 @@ class MotorMount(element.Primitive):
 
 
 class YBearingMount(component.Element):
+    #the bearing turns on a screw through the nut trap
+    VITAMINS = [("bearing.BallBearing", "bearingSize", 1),
+                ("hardware.CapScrew", "nutSize", 1),
+                ("hardware.Nut", "nutSize", 1),
+                ("WoodScrew", "holeDiameter", 4)]
+
     def __init__(self, rodDiameter=8,
                  mountLength=38,
                  stepper="GenericNEMA17",
@@ -458,12 +726,12 @@ class YBearingMount(component.Element):
                  holeDiameter=3.5):
         component.Element.__init__(self, name="yrodmount")
         #Used Elements
-        self.stepper = motor.Stepper(size=stepper)
-        self.belt = belt.TimingBelt(size=beltSize)
-        self.bearing = bearing.BallBearing(size=bearingSize)
-        self.lb = bearing.LinearBallBearing(size=linearBearing)
+        self.stepper = vitamin("motor.Stepper", stepper)
+        self.belt = vitamin("belt.TimingBelt", beltSize)
+        self.bearing = vitamin("bearing.BallBearing", bearingSize)
+        self.lb = vitamin("bearing.LinearBallBearing", linearBearing)
         self.beltSeperation = self.bearing.outerDiameter
-        self.nut = hardware.Nut(size=nutSize)
+        self.nut = vitamin("hardware.Nut", nutSize)
         self.yRodMount = YRodMount(rodDiameter=8,
                                    mountLength=mountLength,
                                    stepper=stepper,
@@ -499,13 +767,16 @@ class YBearingMount(component.Element):
                             height=self.yRodMount.plateThick+0.2)
         hole.location=[self.yRodMount.width/2, self.bearingHoldRadius, -0.1]
         nut = NutTrap(nut=self.nut)
-        nut.location = hole.location
+        nut.location = copy.copy(hole.location)
         asm += bearingBot
         asm -= bearingSub + hole + nut
         return asm
 
 
 class YRodMount(element.Primitive):
+    #share of the mount length the rod sits in, unless reassigned
+    rodDepthFactor = 0.8
+
     def __init__(self,
                  rodDiameter=8,
                  mountLength=38,
@@ -518,10 +789,10 @@ class YRodMount(element.Primitive):
                  holeDiameter=3.5):
         element.Primitive.__init__(self, name="yrodmount")
         #Used Elements
-        self.stepper = motor.Stepper(size=stepper)
-        self.belt = belt.TimingBelt(size=beltSize)
-        self.nut = hardware.Nut(size=nutSize)
-        self.lb = bearing.LinearBallBearing(size=linearBearing)
+        self.stepper = vitamin("motor.Stepper", stepper)
+        self.belt = vitamin("belt.TimingBelt", beltSize)
+        self.nut = vitamin("hardware.Nut", nutSize)
+        self.lb = vitamin("bearing.LinearBallBearing", linearBearing)
         self.beltSeperation = beltSeperation
         self.beltWidth = beltWidth
         self.holeDiameter = holeDiameter
@@ -535,7 +806,7 @@ class YRodMount(element.Primitive):
         self.rodDiameter = rodDiameter
         self.rodCenter = self.plateThick + self.rodDiameter/2
         #should be reassigned by implementation
-        self.rodDepth = self.length * 0.8
+        self.rodDepth = self.length * self.rodDepthFactor
         #should be reassigned by implementation
         self.rodStart = self.length - self.rodDepth
         # beltpass represents space around the belt
@@ -565,27 +836,23 @@ class YRodMount(element.Primitive):
         rodEn.location = [self.width/2, self.rodEncasementStart, self.rodCenter]
         asm = rodEn
         #Mounting holes
-        for i in range(0, 4):
-            holeTab = shape.D(radius=self.tabRadius,
-                             extension=self.width/2-self.tabRadius,
-                             length=self.plateThick)
-            holeTab.location = copy.copy(self.mountingHoles[i])
-            holeTab.location[2] = 0
-            if i in [0, 1]:
-                holeTab.rotation.angle = -90
-                holeTab.rotation.axis = [0, 0, 1]
-            if i in [2, 3]:
-                holeTab.rotation.angle = 90
-                holeTab.rotation.axis = [0, 0, 1]
-            hole = element.Hole(radius=self.holeDiameter/2,
-                                height=self.plateThick+0.2)
-            hole.location = self.mountingHoles[i]
-            countersink = element.Cone(topRadius=self.tabRadius,
-                                       bottomRadius=self.holeDiameter/2,
-                                       height=self.countersinkHeight+0.1)
-            countersink.location = copy.copy(self.mountingHoles[i])
-            countersink.location[2] = self.plateThick-self.countersinkHeight
-            asm = asm + holeTab - hole - countersink
+        holeTab = shape.D(radius=self.tabRadius,
+                          extension=self.width/2-self.tabRadius,
+                          length=self.plateThick)
+        holeTabs = HolePattern(holeTab,
+                               [[x, y, 0] for x, y, z in self.mountingHoles],
+                               [([0, 0, 1], -90), ([0, 0, 1], -90),
+                                ([0, 0, 1], 90), ([0, 0, 1], 90)])
+        hole = element.Hole(radius=self.holeDiameter/2,
+                            height=self.plateThick+0.2)
+        holes = HolePattern(hole, self.mountingHoles)
+        countersink = element.Cone(topRadius=self.tabRadius,
+                                   bottomRadius=self.holeDiameter/2,
+                                   height=self.countersinkHeight+0.1)
+        countersinks = HolePattern(countersink,
+                                   [[x, y, self.plateThick-self.countersinkHeight]
+                                    for x, y, z in self.mountingHoles])
+        asm = asm + holeTabs - (holes + countersinks)
         #rod
         rod = element.Hole(radius=self.rodDiameter/2, height=self.length+0.1)
         rod.rotation.axis = [1, 0, 0]
@@ -633,7 +900,7 @@ class LinearBearingHolder(element.Primitive):
         squareBase1 = element.Cube(size=[(self.length-self.zipTieWidth)/2,
                                          self.width,
                                          self.bearingCenter])
-        squareBase2 = copy.deepcopy(squareBase1)
+        squareBase2 = placedCopy(squareBase1)
         squareBase2.location = [(self.length+self.zipTieWidth)/2, 0, 0]
         rodClearance = dShapeNeg(radius=self.lb.innerDiameter/2+0.5,
                                  extension=self.lb.outerDiameter,
@@ -693,7 +960,7 @@ class LinearBearingHolder(element.Primitive):
         squareBase1 = element.Cube(size=[(self.length-self.zipTieWidth)/2,
                                          self.width,
                                          self.bearingCenter])
-        squareBase2 = copy.deepcopy(squareBase1)
+        squareBase2 = placedCopy(squareBase1)
         squareBase2.location = [(self.length+self.zipTieWidth)/2, 0, 0]
         rodClearance = dShapeNeg(radius=self.lb.innerDiameter/2+0.5,
                                  extension=self.lb.outerDiameter,
@@ -734,8 +1001,8 @@ class LinearBearingHolderCap(element.Primitive):
         core.location = [0, h.width/2, h.lb.outerDiameter/2]
         core.rotation.angle = 90
         core.rotation.axis = [0, 1, 0]
-        lb = copy.deepcopy(h.lb)
-        lb.rotation = core.rotation
+        lb = placedCopy(h.lb)
+        lb.rotation = copy.copy(core.rotation)
         lb.location = [h.wall, h.width/2, h.lb.outerDiameter/2]
         return operation.Intersection([base, core]) - lb
 
@@ -762,12 +1029,12 @@ class BeltClamp(element.Primitive):
         xcar = self.xcar
         thickness = self.thickness
         a = element.Cylinder(radius=xcar.nut.width-0.5, height=thickness)
-        b = copy.deepcopy(a)
+        b = placedCopy(a)
         b.location = [xcar.beltClampHoleSpacing, 0, 0]
         asm = operation.Hull([a, b])
         c = element.Hole(radius=xcar.screw.outerDiameter/2,
                          height=thickness+0.2)
-        d = copy.deepcopy(c)
+        d = placedCopy(c)
         c.location = [0, 0, -0.1]
         d.location = [xcar.beltClampHoleSpacing, 0, -0.1]
         asm -= c + d
@@ -798,9 +1065,9 @@ class nShape(element.Primitive):
 
 
 class NutTrap(element.Primitive):
-    def __init__(self, nut=None):
+    def __init__(self, nut=None, widthTolerance=0):
         element.Primitive.__init__(self, name="nuttrap")
-        self.construction = element.Ntube(apothem=nut.width/2,
+        self.construction = element.Ntube(apothem=nut.width/2+widthTolerance,
                                           sides=6,
                                           height=nut.height+0.1)
 
@@ -814,6 +1081,102 @@ class NutSlot(element.Primitive):
         self.construction = NutTrap(nut=nut) + ext
 
 
+class HolePattern(element.Primitive):
+    """Copies of one prototype element at many placements.
+
+    positions is an (N,3) sequence of locations. rotations, if given, has one
+    ([x, y, z] axis, angle) pair per position; None keeps the prototype's own
+    rotation. The copies share the prototype's construction and are combined
+    in a single union, so the pattern can be subtracted in one step.
+    """
+    def __init__(self, prototype=None, positions=[], rotations=None):
+        element.Primitive.__init__(self, name="holepattern")
+        self.prototype = prototype
+        base = Transform.of(prototype)
+        if rotations is None:
+            rotations = [None]*len(positions)
+        self.placements = []
+        for position, rotation in zip(positions, rotations):
+            axis, angle = rotation or (base.axis, base.angle)
+            self.placements.append(Transform(position, axis, angle))
+        self.construction = operation.Union([placedCopy(prototype, t)
+                                             for t in self.placements])
+
+
+class CalibrationPlate(element.Primitive):
+    """One plate of tolerance coupons, one column per tolerance.
+
+    Rows are, from the front: screw holes, rod holes, nut traps and linear
+    bearing holder coupons, the first couponLength of a holder past its end
+    wall. Each row is a single strip with all of its features subtracted at
+    once.
+    """
+    def __init__(self,
+                 tolerances=[0, 0.05, 0.1, 0.15, 0.2],
+                 linearBallBearing="LM8UU",
+                 screw="M3",
+                 rodDiameter=8,
+                 thickness=5,
+                 spacing=3,
+                 couponLength=10):
+        element.Primitive.__init__(self, name="calibrationplate")
+        self.tolerances = tolerances
+        self.linearBallBearing = linearBallBearing
+        self.screw = vitamin("hardware.CapScrew", screw, length=0)
+        self.nut = vitamin("hardware.Nut", screw)
+        self.rodDiameter = rodDiameter
+        self.thickness = thickness
+        self.spacing = spacing
+        self.couponLength = couponLength
+        maxTolerance = max(tolerances)
+        self.pitch = max(self.rodDiameter, self.nut.width/math.cos(math.pi/6),
+                         self.screw.outerDiameter) + maxTolerance*2 + spacing*2
+        self.construction = self._construction()
+
+    def _strip(self, row, features):
+        strip = element.Cube([self.pitch*len(self.tolerances),
+                              self.pitch,
+                              self.thickness])
+        strip.location = [0, row*self.pitch, 0]
+        for idx, feature in enumerate(features):
+            feature.location = [self.pitch*(idx+0.5),
+                                self.pitch*(row+0.5),
+                                feature.location[2]]
+        return strip - operation.Union(features)
+
+    def _construction(self):
+        height = self.thickness + 0.2
+        screwHoles = [element.Hole(radius=self.screw.outerDiameter/2,
+                                   height=height,
+                                   tolerance=t) for t in self.tolerances]
+        rodHoles = [element.Hole(radius=self.rodDiameter/2,
+                                 height=height,
+                                 tolerance=t) for t in self.tolerances]
+        for hole in screwHoles + rodHoles:
+            hole.location = [0, 0, -0.1]
+        traps = [NutTrap(nut=self.nut, widthTolerance=t)
+                 for t in self.tolerances]
+        for trap in traps:
+            trap.location = [0, 0, self.thickness-self.nut.height]
+        asm = self._strip(0, screwHoles)
+        asm += self._strip(1, rodHoles)
+        asm += self._strip(2, traps)
+        # linear bearing holders, cut down to a coupon
+        x = 0
+        for t in self.tolerances:
+            holder = LinearBearingHolder(linearBallBearing=self.linearBallBearing,
+                                         useZipTie=False,
+                                         radiusTolerance=t)
+            coupon = element.Cube([holder.wall+self.couponLength,
+                                   holder.width,
+                                   holder.height])
+            holder.location = [x, self.pitch*3, 0]
+            coupon.location = [x, self.pitch*3, 0]
+            x += coupon.size[0] + self.spacing
+            asm += operation.Intersection([holder, coupon])
+        return asm
+
+
 class DrillTemplate(element.Primitive):
     def __init__(self, yRodMount=None, holeDiameter=2, wall=4, wallHeight=12):
         element.Primitive.__init__(self, name="drilltemplate")
@@ -823,11 +1186,9 @@ class DrillTemplate(element.Primitive):
         sideWall.size = [yRodMount.width+yRodMount.length, wall, wallHeight]
         sideWall.location = [0, yRodMount.length, 0]
         asm += sideWall
-        for holeLocation in yRodMount.mountingHoles:
-            hole = element.Hole(radius=holeDiameter/2,
-                                height=wall+0.2)
-            hole.location = holeLocation
-            asm -= hole
+        hole = element.Hole(radius=holeDiameter/2,
+                            height=wall+0.2)
+        asm -= HolePattern(hole, yRodMount.mountingHoles)
         sideHole1 = element.Hole(radius=holeDiameter/2,
                                  height=wall+0.2)
         sideHole2 = element.Hole(radius=holeDiameter/2,
@@ -841,57 +1202,1605 @@ class DrillTemplate(element.Primitive):
         asm -= sideHole1 + sideHole2
         self.construction = asm
 
+#Export
+#
+#Every backend implements the Exporter interface and is registered by format
+#name. exportPart walks a part's tree once, flattening transforms as it goes,
+#and feeds the same enter/leave events to every selected backend.
+
+EXPORTERS = {}
+
+
+def registerExporter(cls):
+    EXPORTERS[cls.format] = cls
+    return cls
+
+
+def _identity():
+    return [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+
+def _translation(location):
+    m = _identity()
+    for i, value in enumerate(list(location or [])[:3]):
+        m[i][3] = float(value)
+    return m
+
+
+def _rotationMatrix(axis, angle):
+    """Rotation about axis by angle degrees (Rodrigues)"""
+    m = _identity()
+    if not angle or not axis:
+        return m
+    norm = math.sqrt(sum(a*a for a in axis))
+    if norm == 0:
+        return m
+    x, y, z = [a/norm for a in axis]
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    t = 1 - c
+    m[0][:3] = [t*x*x + c, t*x*y - s*z, t*x*z + s*y]
+    m[1][:3] = [t*x*y + s*z, t*y*y + c, t*y*z - s*x]
+    m[2][:3] = [t*x*z - s*y, t*y*z + s*x, t*z*z + c]
+    return m
+
+
+def _matmul(a, b):
+    return [[sum(a[i][k]*b[k][j] for k in range(4)) for j in range(4)]
+            for i in range(4)]
+
+
+def _transformPoint(m, point):
+    return [m[i][0]*point[0] + m[i][1]*point[1] + m[i][2]*point[2] + m[i][3]
+            for i in range(3)]
+
+
+_STRUCTURAL = ["name", "location", "rotation", "elements", "construction"]
+
+
+def _isPlain(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_isPlain(v) for v in value)
+    return type(value).__name__ == "unicode"
+
+
+class ExportNode(object):
+    """One node of a part tree, as seen by the exporters"""
+    __slots__ = ["node", "kind", "name", "params", "location", "axis",
+                 "angle", "matrix", "depth", "path", "children"]
+
+    def __init__(self, node, matrix, depth, path):
+        self.node = node
+        self.kind = type(node).__name__
+        self.name = getattr(node, "name", None)
+        self.params = dict((key, value) for key, value in vars(node).items()
+                           if key not in _STRUCTURAL and
+                           not key.startswith("_") and _isPlain(value))
+        self.location = list(getattr(node, "location", None) or [0, 0, 0])
+        rotation = getattr(node, "rotation", None)
+        self.axis = list(getattr(rotation, "axis", None) or [0, 0, 1])
+        self.angle = getattr(rotation, "angle", 0) or 0
+        self.depth = depth
+        self.path = path
+        self.children = _children(node)
+        local = _matmul(_translation(self.location),
+                        _rotationMatrix(self.axis, self.angle))
+        if self.kind == "Rotate":
+            local = _matmul(local, _rotationMatrix(self.params.get("axis"),
+                                                   self.params.get("angle")))
+        self.matrix = _matmul(matrix, local)
+
+
+def _children(node):
+    elements = getattr(node, "elements", None)
+    if elements is not None:
+        return list(elements)
+    construction = getattr(node, "construction", None)
+    if construction is not None:
+        return [construction]
+    return []
+
+
+def walkTree(part):
+    """Yields ("enter", ExportNode) and ("leave", ExportNode) events"""
+    root = ExportNode(part, _identity(), 0, "0")
+    stack = [(root, enumerate(root.children))]
+    yield "enter", root
+    while stack:
+        info, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            yield "leave", info
+            continue
+        index, node = child
+        childInfo = ExportNode(node, info.matrix, info.depth + 1,
+                               "%s/%d" % (info.path, index))
+        stack.append((childInfo, enumerate(childInfo.children)))
+        yield "enter", childInfo
+
+
+class Exporter(object):
+    """Base class for export backends.
+
+    An exporter is handed the enter/leave events of one tree walk and writes
+    its output to path. finish() may start a post-processing subprocess and
+    return it.
+    """
+    format = None
+    directory = None
+    extension = None
+
+    def __init__(self, path):
+        self.path = path
+        self.stream = None
+
+    def outputs(self):
+        """Every file this exporter writes"""
+        return [self.path]
+
+    def begin(self, part, name):
+        self.stream = open(self.path, "w")
+
+    def enter(self, info):
+        pass
+
+    def leave(self, info):
+        pass
+
+    def end(self):
+        self.stream.close()
+
+    def finish(self):
+        return None
+
+
+@registerExporter
+class TextcadExporter(Exporter):
+    """textcad JSON, converted to SCAD by the textcad command.
+
+    This backend doesn't use the shared walk: utility.export walks the part
+    again by itself. Its SCAD goes to <outdir>/scad like ScadExporter's, so
+    the two formats can't be exported together.
+    """
+    format = "textcad"
+    directory = "json"
+    extension = ".json"
+
+    def __init__(self, path):
+        Exporter.__init__(self, path)
+        base = os.path.dirname(os.path.dirname(path))
+        name = os.path.splitext(os.path.basename(path))[0]
+        self.scadPath = os.path.join(base, "scad", name + ".scad")
+
+    def outputs(self):
+        return [self.path, self.scadPath]
+
+    def begin(self, part, name):
+        self.part = part
+
+    def end(self):
+        utility.export(self.part, self.path)
+
+    def finish(self):
+        return subprocess.Popen(["textcad", "-o", self.scadPath, self.path])
+
+
+@registerExporter
+class JsonExporter(Exporter):
+    """Flattened tree with world transforms, streamed as it is walked"""
+    format = "json"
+    directory = "json"
+    extension = ".tree.json"
+
+    def begin(self, part, name):
+        Exporter.begin(self, part, name)
+        self.first = [True]
+        self.stream.write('{"name": %s, "root": ' % json.dumps(name))
+
+    def enter(self, info):
+        if not self.first[-1]:
+            self.stream.write(", ")
+        self.first[-1] = False
+        node = {"kind": info.kind, "name": info.name, "path": info.path,
+                "params": info.params, "matrix": info.matrix}
+        self.stream.write(json.dumps(node, sort_keys=True)[:-1])
+        self.stream.write(', "children": [')
+        self.first.append(True)
+
+    def leave(self, info):
+        self.first.pop()
+        self.stream.write("]}")
+
+    def end(self):
+        self.stream.write("}\n")
+        Exporter.end(self)
+
+
+_SCAD_OPERATIONS = {
+    "Union": "union()",
+    "Difference": "difference()",
+    "Subtraction": "difference()",
+    "Intersection": "intersection()",
+    "Hull": "hull()",
+}
+
+
+def _scadVector(vector):
+    return "[%s]" % ", ".join("%g" % v for v in vector)
+
+
+def _scadLeaf(info):
+    p = info.params
+    center = p.get("center") or [False, False, False]
+    if info.kind == "Cube":
+        size = p.get("size", [1, 1, 1])
+        offset = [-s/2 if c else 0 for s, c in zip(size, center)]
+        cube = "cube(size=%s)" % _scadVector(size)
+        if any(offset):
+            return "translate(%s) %s" % (_scadVector(offset), cube)
+        return cube
+    centered = ", center=true" if center[2] else ""
+    if info.kind in ["Cylinder", "Hole"]:
+        radius = p.get("radius", 1) + (p.get("tolerance") or 0)
+        return "cylinder(r=%g, h=%g%s)" % (radius, p.get("height", 1),
+                                           centered)
+    if info.kind == "Cone":
+        return "cylinder(r1=%g, r2=%g, h=%g%s)" % (p.get("bottomRadius", 1),
+                                                   p.get("topRadius", 1),
+                                                   p.get("height", 1),
+                                                   centered)
+    if info.kind == "Ntube":
+        sides = p.get("sides", 6)
+        radius = p.get("apothem", 1) / math.cos(math.pi/sides)
+        return "cylinder(r=%g, h=%g, $fn=%d%s)" % (radius, p.get("height", 1),
+                                                   sides, centered)
+    return None
+
+
+@registerExporter
+class ScadExporter(Exporter):
+    """OpenSCAD source written directly from the tree"""
+    format = "scad"
+    directory = "scad"
+    extension = ".scad"
+
+    def begin(self, part, name):
+        Exporter.begin(self, part, name)
+        self.skip = None
+        self.offset = 0
+        self.stream.write("// %s\n" % name)
+
+    def _transform(self, info):
+        transform = ""
+        if any(info.location):
+            transform += "translate(%s) " % _scadVector(info.location)
+        if info.angle:
+            transform += "rotate(a=%g, v=%s) " % (info.angle,
+                                                  _scadVector(info.axis))
+        if info.kind == "Rotate" and info.params.get("angle"):
+            transform += "rotate(a=%g, v=%s) " % (
+                info.params["angle"], _scadVector(info.params["axis"]))
+        return transform
+
+    def _writePattern(self, info):
+        """Write a HolePattern as one loop over its placements"""
+        indent = "    " * (info.depth + self.offset)
+        rows = ["%s[%s]" % (indent + "    ", ", ".join("%g" % v for v in
+                                            list(t.location) + list(t.axis) +
+                                            [t.angle]))
+                for t in info.node.placements]
+        self.stream.write("%s%sfor (t = [\n%s]) translate([t[0], t[1], t[2]]) "
+                          "rotate(a=t[6], v=[t[3], t[4], t[5]]) {\n" %
+                          (indent, self._transform(info), ",\n".join(rows)))
+        offset = self.offset
+        self.offset += info.depth + 1
+        for event, sub in walkTree(info.node.prototype):
+            if sub.path == "0":
+                #the loop places the prototype
+                sub.location = [0, 0, 0]
+                sub.angle = 0
+            getattr(self, event)(sub)
+        self.offset = offset
+        self.stream.write(indent + "}\n")
+
+    def enter(self, info):
+        if self.skip is not None:
+            return
+        if info.kind == "HolePattern":
+            self._writePattern(info)
+            self.skip = info.path
+            return
+        indent = "    " * (info.depth + self.offset)
+        if info.children:
+            op = _SCAD_OPERATIONS.get(info.kind, "union()")
+            self.stream.write("%s%s%s {\n" % (indent, self._transform(info),
+                                              op))
+            return
+        leaf = _scadLeaf(info)
+        if leaf is None:
+            self.stream.write("%s// unsupported %s\n" % (indent, info.kind))
+        else:
+            self.stream.write("%s%s%s;\n" % (indent, self._transform(info),
+                                             leaf))
+
+    def leave(self, info):
+        if self.skip is not None:
+            if info.path == self.skip:
+                self.skip = None
+            return
+        if info.children:
+            self.stream.write("    " * (info.depth + self.offset) + "}\n")
+
+
+@registerExporter
+class StlExporter(ScadExporter):
+    """STL, rendered by openscad from SCAD written next to it"""
+    format = "stl"
+    directory = "stl"
+    extension = ".stl"
+
+    def __init__(self, path):
+        ScadExporter.__init__(self, path)
+        self.stlPath = path
+        self.path = os.path.splitext(path)[0] + ".scad"
+
+    def outputs(self):
+        return [self.path, self.stlPath]
+
+    def finish(self):
+        return subprocess.Popen(["openscad", "-o", self.stlPath, self.path])
+
+
+def createExporters(name, formats=["textcad"], outdir="."):
+    """Returns an exporter per format, raising ValueError if two of them
+    would write the same file"""
+    exporters = []
+    written = {}
+    for fmt in formats:
+        cls = EXPORTERS[fmt]
+        exporter = cls(os.path.join(outdir, cls.directory,
+                                    name + cls.extension))
+        for path in exporter.outputs():
+            if path in written and written[path] != fmt:
+                raise ValueError("formats %s and %s both write %s" %
+                                 (written[path], fmt, path))
+            written[path] = fmt
+        exporters.append(exporter)
+    return exporters
+
+
+def exportPart(part, name, formats=["textcad"], outdir="."):
+    """Export part to every format in one tree walk.
+
+    Returns the post-processing subprocesses that were started.
+    """
+    exporters = createExporters(name, formats, outdir)
+    for exporter in exporters:
+        for path in exporter.outputs():
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+    for exporter in exporters:
+        exporter.begin(part, name)
+    if any(type(e).enter is not Exporter.enter for e in exporters):
+        for event, info in walkTree(part):
+            for exporter in exporters:
+                getattr(exporter, event)(info)
+    for exporter in exporters:
+        exporter.end()
+    return [p for p in (e.finish() for e in exporters) if p is not None]
+
+
+
+#Build
+#
+#Every exported part is registered with the parts it needs to be constructed.
+#Building a selection only constructs the selected parts and their
+#dependencies.
+
+DEFAULT_PARAMETERS = {
+    "stepper": "GenericNEMA17",
+    "linearBearing": "LM8UU",
+    "yLinearBearing": "LM8UU",
+    "carriageBearing": "624zz",
+    "screw": "M3",
+    "beltSize": "GT2",
+    "beltWidth": 6,
+    "bearingSize": "625zz",
+    "rodDiameter": 8,
+    "holeDiameter": 3.5,
+    "woodWidth": 38.3,
+    "tolerances": [0, 0.05, 0.1, 0.15, 0.2],
+}
+
+
+def _parameters(overrides=None):
+    """DEFAULT_PARAMETERS updated with overrides"""
+    p = dict(DEFAULT_PARAMETERS)
+    p.update(overrides or {})
+    return p
+
+
+PARTS = {}
+PART_ORDER = []
+#Parts built when none are selected
+DEFAULT_PARTS = []
+
+
+class PartSpec(object):
+    """How a part is constructed.
+
+    arguments maps constructor arguments to parameter names, requires maps
+    them to the parts they are built from and fixed holds constant values.
+    Every other argument keeps the class default.
+    """
+    def __init__(self, cls, arguments={}, requires={}, fixed={}):
+        self.cls = cls
+        self.arguments = dict(arguments)
+        self.requires = dict(requires)
+        self.fixed = dict(fixed)
+
+    def kwargs(self, p):
+        """Constructor arguments for parameters p, class defaults included,
+        dependencies excluded"""
+        kwargs = _defaults(self.cls)
+        kwargs.update(self.fixed)
+        kwargs.update((arg, p[name]) for arg, name in self.arguments.items())
+        for arg in self.requires:
+            kwargs.pop(arg, None)
+        return kwargs
+
+    def build(self, p, parts):
+        kwargs = dict(self.fixed)
+        kwargs.update((arg, p[name]) for arg, name in self.arguments.items())
+        kwargs.update((arg, parts[name]) for arg, name in self.requires.items())
+        return self.cls(**kwargs)
+
+
+def _defaults(cls):
+    try:
+        parameters = inspect.signature(cls).parameters.values()
+        return dict((p.name, p.default) for p in parameters
+                    if p.default is not p.empty)
+    except AttributeError:
+        spec = inspect.getargspec(cls.__init__)
+        defaults = spec.defaults or ()
+        return dict(zip(spec.args[len(spec.args)-len(defaults):], defaults))
+
+
+def registerPart(name, cls, arguments={}, requires={}, fixed={},
+                 default=True):
+    PARTS[name] = PartSpec(cls, arguments, requires, fixed)
+    PART_ORDER.append(name)
+    if default:
+        DEFAULT_PARTS.append(name)
+
+
+_ROD_MOUNT_ARGUMENTS = {"rodDiameter": "rodDiameter",
+                        "mountLength": "woodWidth",
+                        "stepper": "stepper",
+                        "beltSize": "beltSize",
+                        "bearingSize": "bearingSize",
+                        "beltWidth": "beltWidth",
+                        "holeDiameter": "holeDiameter"}
+
+registerPart("xcar", XCarriage,
+             arguments={"linearBallBearing": "linearBearing",
+                        "screw": "screw",
+                        "beltSize": "beltSize",
+                        "beltWidth": "beltWidth"})
+registerPart("ybearing", YBearingMount, arguments=_ROD_MOUNT_ARGUMENTS)
+registerPart("belt_retainer", BeltRetainer,
+             requires={"yBearingMount": "ybearing"}, fixed={"height": 2})
+registerPart("motor_mount", MotorMount, arguments=_ROD_MOUNT_ARGUMENTS)
+registerPart("belt_clamp", BeltClamp,
+             requires={"xCarriage": "xcar"}, fixed={"thickness": 4})
+registerPart("ycar", YCarriage,
+             arguments={"linearBallBearing": "yLinearBearing",
+                        "ballBearing": "carriageBearing"},
+             requires={"xCarriage": "xcar", "bearingMount": "ybearing"})
+registerPart("yrodmount", YRodMount, default=False)
+registerPart("drill_template", DrillTemplate,
+             requires={"yRodMount": "yrodmount"})
+registerPart("ycar_plate", YCarriagePlate, requires={"yCarriage": "ycar"})
+registerPart("calibration", CalibrationPlate,
+             arguments={"tolerances": "tolerances",
+                        "linearBallBearing": "linearBearing",
+                        "screw": "screw",
+                        "rodDiameter": "rodDiameter"},
+             default=False)
+
+
+def buildOrder(names):
+    """Selected parts and their dependencies, dependencies first"""
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in PARTS:
+            raise KeyError("unknown part %r" % name)
+        for dependency in PARTS[name].requires.values():
+            visit(dependency)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def buildParts(names, parameters=None):
+    """Construct the named parts, sharing dependencies between them"""
+    p = _parameters(parameters)
+    parts = {}
+    for name in buildOrder(names):
+        parts[name] = PARTS[name].build(p, parts)
+    return dict((name, parts[name]) for name in names)
+
+
+def _exportParts(parts, formats, outdir):
+    """Exports every part before waiting for any post-processing, so the
+    textcad and openscad processes of all parts overlap.
+
+    Yields (name, seconds from the start of its export until its last
+    process exited) as parts complete.
+    """
+    pending = []
+    for name, part in parts.items():
+        start = time.time()
+        pending.append((name, start, exportPart(part, name, formats, outdir)))
+    while pending:
+        for item in list(pending):
+            name, start, processes = item
+            if all(process.poll() is not None for process in processes):
+                pending.remove(item)
+                yield name, time.time() - start
+        if pending:
+            time.sleep(0.01)
+
+
+#Parts built by the parent, for the export workers
+_builtParts = {}
+
+
+def _useBuiltParts(vitamins, parts):
+    """Export worker initializer"""
+    global _builtParts
+    _useVitaminTable(vitamins)
+    _builtParts = parts
+
+
+def _exportJob(job):
+    name, formats, outdir = job
+    return next(_exportParts({name: _builtParts[name]}, formats, outdir))
+
+
+#Frame
+#
+#Rod, belt and wood lengths and the vitamin bill of materials are derived
+#from vitamin dimensions and the build volume alone, without constructing
+#any geometry, so whole sweeps of variants can be priced quickly.
+
+#How many of each part one machine uses. The vitamins of a part are declared
+#by its class in VITAMINS.
+MACHINE_PARTS = {
+    "xcar": 1,
+    "ycar": 2,
+    "ycar_plate": 2,
+    "ybearing": 2,
+    "motor_mount": 2,
+    "belt_clamp": 2,
+    "belt_retainer": 4,
+}
+
+#Vitamins of the Z axis, which has no parts here: (kind, CoreBotConfig
+#attribute, count). The size is the third entry of the attribute.
+Z_VITAMINS = [("motor.Stepper", "stepper", 1),
+              ("bearing.LinearBallBearing", "linear", 2),
+              ("bearing.BallBearing", "bearing", 1)]
+
+FRAME_FIELDS = ["variant", "category", "item", "size", "count", "length"]
+
+
+def configParameters(config):
+    """Part parameters for the vitamins of config, whose lists are indexed
+    by axis: the A and B steppers drive X and Y, and the first bearing is the
+    idler of the rod mounts, the second the one of the Y carriages"""
+    if config.stepper[0] != config.stepper[1]:
+        raise ValueError("the A and B steppers must match: %s, %s" %
+                         tuple(config.stepper[:2]))
+    return {"stepper": config.stepper[0],
+            "linearBearing": config.linear[0],
+            "yLinearBearing": config.linear[1],
+            "bearingSize": config.bearing[0],
+            "carriageBearing": config.bearing[1]}
+
+
+def frameParameters(config, parameters=None):
+    """Parameters for config, overridden by parameters"""
+    p = _parameters(configParameters(config))
+    p.update(parameters or {})
+    return p
+
+
+def frameDimensions(config, parameters=None):
+    """Lengths of the frame members for config.buildVolume.
+
+    The frame is a box of square wood stock around the build volume. Its
+    inside leaves room for the X carriage travel and the motor and bearing
+    mounts on X, and for the Y carriages and end beams on Y. X rods end in the
+    Y carriages; Y rods sit in rod mounts that are one stock width long.
+    """
+    p = frameParameters(config, parameters)
+    xlb = vitamin("bearing.LinearBallBearing", p["linearBearing"])
+    ylb = vitamin("bearing.LinearBallBearing", p["yLinearBearing"])
+    stepper = vitamin("motor.Stepper", p["stepper"])
+    pulley = vitamin("bearing.BallBearing", p["bearingSize"])
+    wood = p["woodWidth"]
+    x, y, z = config.buildVolume
+    #same proportions as LinearBearingHolder, XCarriage and YCarriage
+    xCarriageLength = xlb.length*2 + xlb.outerDiameter*0.25*3
+    yCarriageLength = (ylb.length + ylb.outerDiameter*0.25*2)*2 - \
+        ylb.outerDiameter*0.25
+    innerX = x + xCarriageLength + stepper.width*2
+    innerY = y + yCarriageLength + wood*2
+    innerZ = z + stepper.width
+    #the rods sit rodDepth deep in a rod mount at each end
+    yRod = y + yCarriageLength + wood*YRodMount.rodDepthFactor*2
+    xRod = x + xCarriageLength + ylb.outerDiameter
+    #each CoreXY belt runs the length of Y twice and across X once
+    belt = innerY*2 + innerX + math.pi*pulley.outerDiameter*2
+    pitch = 2
+    return {"innerX": innerX, "innerY": innerY, "innerZ": innerZ,
+            "xRod": xRod, "yRod": yRod,
+            "belt": math.ceil(belt/pitch)*pitch,
+            "uprights": innerZ, "xBeams": innerX, "yBeams": innerY + wood*2}
+
+
+def frameRows(config, parameters=None, variant=""):
+    """Yields the cut list and bill of materials of one machine as rows.
+
+    Vitamin sizes come from config, then from parameters, then from the
+    defaults of the part classes.
+    """
+    p = frameParameters(config, parameters)
+    d = frameDimensions(config, p)
+    rod = "%gmm" % p["rodDiameter"]
+    wood = "%gx%g" % (p["woodWidth"], p["woodWidth"])
+    for category, item, size, count, length in [
+            ("rod", "x rod", rod, 2, d["xRod"]),
+            ("rod", "y rod", rod, 2, d["yRod"]),
+            ("belt", "belt", p["beltSize"], 2, d["belt"]),
+            ("wood", "upright", wood, 4, d["uprights"]),
+            ("wood", "x beam", wood, 4, d["xBeams"]),
+            ("wood", "y beam", wood, 4, d["yBeams"])]:
+        yield {"variant": variant, "category": category, "item": item,
+               "size": size, "count": count, "length": round(length, 2)}
+    counts = {}
+    for part, partCount in sorted(MACHINE_PARTS.items()):
+        spec = PARTS[part]
+        kwargs = spec.kwargs(p)
+        for kind, argument, count in getattr(spec.cls, "VITAMINS", []):
+            key = (kind, kwargs[argument])
+            counts[key] = counts.get(key, 0) + count*partCount
+    for kind, attribute, count in Z_VITAMINS:
+        size = getattr(config, attribute)[2]
+        if size is not None:
+            counts[(kind, size)] = counts.get((kind, size), 0) + count
+    for (kind, size), count in sorted(counts.items(),
+                                      key=lambda item: str(item[0])):
+        yield {"variant": variant, "category": "vitamin",
+               "item": kind.split(".")[-1], "size": size, "count": count,
+               "length": ""}
+
+
+def writeRows(rows, stream, fmt="csv"):
+    """Stream rows to stream as CSV or as JSON lines"""
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, FRAME_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, sort_keys=True) + "\n")
+
+
+def variantRows(variants, parameters=None):
+    """Rows for JSON variants: {"id", "buildVolume", "stepper", "linear",
+    "bearing", "parameters"}.
+
+    A variant's own parameters override parameters. A variant that cannot be
+    priced yields a single row with category "error" in place of its rows.
+    """
+    for index, variant in enumerate(variants):
+        name = variant.get("id", index)
+        p = dict(parameters or {})
+        p.update(variant.get("parameters") or {})
+        try:
+            config = CoreBotConfig(**dict(
+                (key, variant[key]) for key in ["buildVolume", "stepper",
+                                                "linear", "bearing"]
+                if key in variant))
+            rows = list(frameRows(config, p, name))
+        except Exception as e:
+            rows = [{"variant": name, "category": "error",
+                     "item": "%s: %s" % (type(e).__name__, e),
+                     "size": "", "count": "", "length": ""}]
+        for row in rows:
+            yield row
+
+
+#Regression
+#
+#A fingerprint is a hash of the normalized part tree, plus a bounding box and
+#a voxel volume sampled from the same tree. Fingerprints of every part are
+#stored as a baseline and later builds are compared against it.
+
+def _round(value, digits=6):
+    if isinstance(value, float):
+        return round(value, digits) + 0.0
+    if isinstance(value, (list, tuple)):
+        return [_round(v, digits) for v in value]
+    if isinstance(value, dict):
+        return dict((k, _round(v, digits)) for k, v in value.items())
+    return value
+
+
+def _hash(value):
+    text = json.dumps(_round(value), sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class _Solid(object):
+    """A node of the tree in world space, for point membership tests"""
+    __slots__ = ["kind", "params", "inverse", "bbox", "children"]
+
+    def __init__(self, info, children):
+        self.kind = info.kind
+        self.params = info.params
+        self.children = children
+        m = info.matrix
+        #rigid transform, so the inverse rotation is the transpose
+        rotation = [[m[j][i] for j in range(3)] for i in range(3)]
+        offset = [-sum(rotation[i][k]*m[k][3] for k in range(3))
+                  for i in range(3)]
+        self.inverse = [rotation[i] + [offset[i]] for i in range(3)]
+        self.inverse.append([0, 0, 0, 1])
+        if not children:
+            local = self._localBounds()
+            self.bbox = None
+            if local is not None:
+                corners = [_transformPoint(m, [x, y, z])
+                           for x in (local[0][0], local[1][0])
+                           for y in (local[0][1], local[1][1])
+                           for z in (local[0][2], local[1][2])]
+                self.bbox = [[min(c[i] for c in corners) for i in range(3)],
+                             [max(c[i] for c in corners) for i in range(3)]]
+            return
+        boxes = [c.bbox for c in children]
+        if self.kind in ["Difference", "Subtraction"]:
+            boxes = boxes[:1]
+        boxes = [b for b in boxes if b is not None]
+        if not boxes:
+            self.bbox = None
+        elif self.kind == "Intersection":
+            self.bbox = [[max(b[0][i] for b in boxes) for i in range(3)],
+                         [min(b[1][i] for b in boxes) for i in range(3)]]
+        else:
+            self.bbox = [[min(b[0][i] for b in boxes) for i in range(3)],
+                         [max(b[1][i] for b in boxes) for i in range(3)]]
+
+    def _radius(self):
+        p = self.params
+        if self.kind == "Cone":
+            return max(p.get("bottomRadius", 1), p.get("topRadius", 1))
+        if self.kind == "Ntube":
+            return p.get("apothem", 1) / math.cos(math.pi/p.get("sides", 6))
+        return p.get("radius", 1) + (p.get("tolerance") or 0)
+
+    def _zRange(self):
+        height = self.params.get("height", 1)
+        center = self.params.get("center") or [False, False, False]
+        return (-height/2, height/2) if center[2] else (0, height)
+
+    def _localBounds(self):
+        p = self.params
+        if self.kind == "Cube":
+            size = p.get("size", [1, 1, 1])
+            center = p.get("center") or [False, False, False]
+            lo = [-s/2 if c else 0 for s, c in zip(size, center)]
+            return [lo, [l+s for l, s in zip(lo, size)]]
+        if self.kind in ["Cylinder", "Hole", "Cone", "Ntube"]:
+            r = self._radius()
+            z0, z1 = self._zRange()
+            return [[-r, -r, z0], [r, r, z1]]
+        return None
+
+    def _containsLocal(self, x, y, z):
+        p = self.params
+        if self.kind == "Cube":
+            lo, hi = self._localBounds()
+            return all(lo[i] <= v <= hi[i] for i, v in enumerate((x, y, z)))
+        z0, z1 = self._zRange()
+        if not z0 <= z <= z1:
+            return False
+        if self.kind in ["Cylinder", "Hole"]:
+            return x*x + y*y <= self._radius()**2
+        if self.kind == "Cone":
+            t = (z - z0) / ((z1 - z0) or 1)
+            r = p.get("bottomRadius", 1)*(1-t) + p.get("topRadius", 1)*t
+            return x*x + y*y <= r*r
+        if self.kind == "Ntube":
+            sides = p.get("sides", 6)
+            apothem = p.get("apothem", 1)
+            for k in range(sides):
+                angle = math.pi*(2*k + 1)/sides
+                if x*math.cos(angle) + y*math.sin(angle) > apothem:
+                    return False
+            return True
+        return False
+
+    def contains(self, point):
+        b = self.bbox
+        if b is None or not all(b[0][i] <= point[i] <= b[1][i]
+                                for i in range(3)):
+            return False
+        if not self.children:
+            return self._containsLocal(*_transformPoint(self.inverse, point))
+        if self.kind in ["Difference", "Subtraction"]:
+            return self.children[0].contains(point) and \
+                not any(c.contains(point) for c in self.children[1:])
+        if self.kind == "Intersection":
+            return all(c.contains(point) for c in self.children)
+        #hulls are sampled as the union of their children
+        return any(c.contains(point) for c in self.children)
+
+
+def fingerprint(part, resolution=24):
+    """Tree hash, per-node hashes, bounding box and voxel volume of a part"""
+    nodes = {}
+    stack = [[]]
+    for event, info in walkTree(part):
+        if event == "enter":
+            stack.append([])
+            continue
+        children = stack.pop()
+        digest = _hash([info.kind, info.params, info.location, info.axis,
+                        info.angle, [c[0] for c in children]])
+        nodes[info.path] = [info.kind, digest]
+        stack[-1].append((digest, _Solid(info, [c[1] for c in children])))
+    digest, solid = stack[0][0]
+    #volume stays None unless it is sampled
+    result = {"hash": digest, "nodes": nodes, "bbox": None,
+              "volume": None, "voxels": None}
+    if solid.bbox is None:
+        result["volume"] = 0.0
+        return result
+    result["bbox"] = _round(solid.bbox, 3)
+    if resolution <= 0:
+        return result
+    lo, hi = solid.bbox
+    step = [(hi[i] - lo[i]) / resolution for i in range(3)]
+    occupied = []
+    for i in range(resolution):
+        for j in range(resolution):
+            for k in range(resolution):
+                point = [lo[0] + step[0]*(i+0.5),
+                         lo[1] + step[1]*(j+0.5),
+                         lo[2] + step[2]*(k+0.5)]
+                occupied.append("1" if solid.contains(point) else "0")
+    voxels = "".join(occupied)
+    result["volume"] = round(voxels.count("1")*step[0]*step[1]*step[2], 3)
+    result["voxels"] = hashlib.sha1(voxels.encode("utf-8")).hexdigest()
+    return result
+
+
+def compareFingerprints(baseline, current):
+    """Returns a list of differences, empty when the fingerprints agree.
+
+    Node differences are reported at the deepest nodes that changed.
+    """
+    if baseline["hash"] == current["hash"]:
+        return []
+    differences = []
+    for key in ["bbox", "volume", "voxels"]:
+        if baseline.get(key) != current.get(key):
+            differences.append("%s: %s -> %s" % (key, baseline.get(key),
+                                                 current.get(key)))
+    old, new = baseline["nodes"], current["nodes"]
+    changed = [path for path in new
+               if path in old and old[path][1] != new[path][1]]
+    changedSet = set(changed)
+    for path in sorted(changed):
+        prefix = path + "/"
+        if any(other.startswith(prefix) for other in changedSet):
+            continue
+        differences.append("changed %s %s" % (path, new[path][0]))
+    for path in sorted(set(new) - set(old)):
+        differences.append("added %s %s" % (path, new[path][0]))
+    for path in sorted(set(old) - set(new)):
+        differences.append("removed %s %s" % (path, old[path][0]))
+    return differences
+
+
+def _fingerprintJob(job):
+    name, parameters, resolution = job
+    part = buildParts([name], parameters)[name]
+    return name, fingerprint(part, resolution)
+
+
+def fingerprintParts(names, parameters=None, resolution=24, jobs=1):
+    """Yields (name, fingerprint) for the named parts, in parallel if jobs > 1"""
+    work = [(name, parameters, resolution) for name in names]
+    if jobs > 1 and len(work) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(work)), _useVitaminTable,
+                                    (_vitaminTable,))
+        for result in pool.imap_unordered(_fingerprintJob, work):
+            yield result
+        pool.close()
+        pool.join()
+    else:
+        for job in work:
+            yield _fingerprintJob(job)
+
+
+#Sweep
+#
+#Variants are streamed to worker processes and each result is written out as
+#soon as it arrives. A worker exits after maxVariants variants or once its
+#resident set grows past maxRss and is replaced by a fresh process. A worker
+#that dies mid-variant, for example from an OOM kill, is reported against
+#that variant and replaced.
+
+SWEEP_PARTS = ["xcar", "ycar", "motor_mount"]
+
+
+def _rss():
+    """Current resident set size in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError):
+        return _peakRss()
+
+
+def _peakRss():
+    """Peak resident set size in bytes since the last _resetPeakRss"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _addressSpace():
+    """Current virtual memory size in bytes, 0 if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (IOError, OSError):
+        return 0
+
+
+def _resetPeakRss():
+    #Linux only; elsewhere the peak covers the worker's lifetime
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except (IOError, OSError):
+        pass
+
+
+def runVariant(variant, resolution=0, outdir=None):
+    """Build the parts of one variant and return their fingerprints"""
+    names = variant.get("parts") or SWEEP_PARTS
+    parts = buildParts(names, variant.get("parameters"))
+    result = {}
+    for name, part in parts.items():
+        fp = fingerprint(part, resolution)
+        result[name] = {"hash": fp["hash"], "bbox": fp["bbox"],
+                        "volume": fp["volume"]}
+        if outdir and variant.get("formats"):
+            for process in exportPart(part, name, variant["formats"],
+                                      os.path.join(outdir,
+                                                   str(variant["id"]))):
+                process.wait()
+    return result
+
+
+def _sweepWorker(conn, options):
+    _useVitaminTable(options["vitaminTable"])
+    if options["memoryLimit"]:
+        limit = options["memoryLimit"]
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    pid = os.getpid()
+    done = 0
+    while True:
+        variant = conn.recv()
+        if variant is None:
+            return
+        _resetPeakRss()
+        start = time.time()
+        row = {"id": variant["id"], "worker": pid}
+        try:
+            row["parts"] = runVariant(variant, options["resolution"],
+                                      options["outdir"])
+        except Exception as e:
+            row["error"] = "%s: %s" % (type(e).__name__, e)
+        row["seconds"] = round(time.time() - start, 4)
+        row["peakRss"] = _peakRss()
+        gc.collect()
+        row["rss"] = _rss()
+        done += 1
+        recycle = done >= options["maxVariants"] or \
+            bool(options["maxRss"] and row["rss"] > options["maxRss"])
+        conn.send((row, recycle))
+        if recycle:
+            return
+
+
+def checkMemoryLimit(memoryLimit):
+    """Raises ValueError if a worker could not even start under memoryLimit"""
+    if memoryLimit and memoryLimit <= _addressSpace():
+        raise ValueError("memory limit of %d bytes is below the %d bytes "
+                         "already mapped" % (memoryLimit, _addressSpace()))
+
+
+def runSweep(variants, stream, workers=1, maxVariants=50, maxRss=None,
+             memoryLimit=None, resolution=0, outdir=None):
+    """Run variants on recycled workers, writing a JSON line per variant.
+
+    Each worker has its own pipe and one variant in flight, so a worker that
+    is killed cannot block the others. maxRss and memoryLimit are in bytes.
+    Returns a summary dict.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1, not %r" % workers)
+    checkMemoryLimit(memoryLimit)
+    options = {"maxVariants": maxVariants, "maxRss": maxRss,
+               "memoryLimit": memoryLimit, "resolution": resolution,
+               "outdir": outdir, "vitaminTable": _vitaminTable}
+    summary = {"submitted": 0, "done": 0, "failed": 0, "recycled": 0,
+               "peakRss": 0}
+    #connection -> [process, id of the variant in flight or None]
+    pool = {}
+
+    def spawn():
+        conn, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_sweepWorker,
+                                          args=(child, options))
+        process.start()
+        child.close()
+        pool[conn] = [process, None]
+
+    def retire(conn):
+        process = pool.pop(conn)[0]
+        conn.close()
+        process.join()
+
+    def write(row):
+        stream.write(json.dumps(row, sort_keys=True) + "\n")
+        stream.flush()
+
+    variants = iter(variants)
+    exhausted = False
+    for i in range(workers):
+        spawn()
+    while True:
+        for conn, worker in list(pool.items()):
+            if worker[1] is not None or exhausted:
+                continue
+            variant = next(variants, None)
+            if variant is None:
+                exhausted = True
+                break
+            variant.setdefault("id", summary["submitted"])
+            summary["submitted"] += 1
+            try:
+                conn.send(variant)
+            except (IOError, OSError):
+                worker[0].join()
+                write({"id": variant["id"], "worker": worker[0].pid,
+                       "error": "worker exited with %s" % worker[0].exitcode})
+                summary["failed"] += 1
+                retire(conn)
+                spawn()
+                continue
+            worker[1] = variant["id"]
+        busy = [conn for conn, worker in pool.items() if worker[1] is not None]
+        if exhausted and not busy:
+            break
+        for conn in _waitConnections(busy, 1):
+            worker = pool[conn]
+            try:
+                row, recycle = conn.recv()
+            except (EOFError, IOError):
+                worker[0].join()
+                write({"id": worker[1], "worker": worker[0].pid,
+                       "error": "worker exited with %s" % worker[0].exitcode})
+                summary["failed"] += 1
+                retire(conn)
+                spawn()
+                continue
+            worker[1] = None
+            summary["failed" if "error" in row else "done"] += 1
+            summary["peakRss"] = max(summary["peakRss"], row["peakRss"])
+            write(row)
+            if recycle:
+                summary["recycled"] += 1
+                retire(conn)
+                spawn()
+    for conn in list(pool):
+        try:
+            conn.send(None)
+        except (IOError, OSError):
+            pass
+        retire(conn)
+    return summary
+
+
+#Queue
+#
+#Build requests (parts, parameters and formats) are queued in SQLite and run
+#by a pool of local worker processes. Results go to a content-addressed
+#store keyed by the normalized request and the code and vitamin table
+#versions, so a repeated request is served from the store instead of being
+#built again. A running job holds a lease its worker keeps renewing; once the
+#lease runs out or the worker is gone the job can be claimed again.
+
+_codeVersion = None
+
+
+def codeVersion():
+    """Hash of this file and of the vitamin table stamp"""
+    global _codeVersion
+    if _codeVersion is None:
+        with open(os.path.abspath(__file__), "rb") as f:
+            source = hashlib.sha1(f.read()).hexdigest()
+        _codeVersion = _hash([source, _vitaminTableStamp()])
+    return _codeVersion
+
+
+def _workerAlive(worker):
+    """False if worker ("host:pid") was a process on this host that is gone"""
+    host, sep, pid = worker.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class BuildQueue(object):
+    #seconds a running job is held without being renewed by its worker
+    lease = 60
+
+    def __init__(self, path="queue.db", store="store"):
+        self.path = path
+        self.store = store
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                               key TEXT PRIMARY KEY,
+                               request TEXT,
+                               status TEXT,
+                               requests INTEGER,
+                               submitted REAL,
+                               started REAL,
+                               finished REAL,
+                               worker TEXT,
+                               timings TEXT,
+                               error TEXT,
+                               lease REAL)""")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(jobs)")]
+        if "lease" not in columns:
+            self.db.execute("ALTER TABLE jobs ADD COLUMN lease REAL")
+
+    @staticmethod
+    def normalize(request):
+        p = _parameters(request.get("parameters"))
+        return {"parts": sorted(set(request.get("parts") or DEFAULT_PARTS)),
+                "parameters": p,
+                "formats": sorted(set(request.get("formats") or ["textcad"]))}
+
+    @staticmethod
+    def key(request):
+        return _hash({"code": codeVersion(),
+                      "request": BuildQueue.normalize(request)})
+
+    def result(self, key):
+        return os.path.join(self.store, key[:2], key)
+
+    def _stale(self, status, worker, lease, now):
+        """True for a running job whose lease ran out or whose worker is gone"""
+        return status == "running" and \
+            (lease is None or lease < now or not _workerAlive(worker or ""))
+
+    def submit(self, request):
+        """Queue request and return its key. Duplicates are only counted,
+        unless they failed, are stale or their result was removed."""
+        request = self.normalize(request)
+        key = self.key(request)
+        built = os.path.isdir(self.result(key))
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("""INSERT OR IGNORE INTO jobs
+                               (key, request, status, requests, submitted)
+                               VALUES (?, ?, ?, 0, ?)""",
+                            (key, json.dumps(request, sort_keys=True),
+                             "done" if built else "queued", now))
+            status, worker, lease = self.db.execute(
+                "SELECT status, worker, lease FROM jobs WHERE key = ?",
+                (key,)).fetchone()
+            if status == "failed" or (status == "done" and not built) or \
+                    self._stale(status, worker, lease, now):
+                status = "queued"
+            self.db.execute("""UPDATE jobs SET requests = requests + 1,
+                               status = ? WHERE key = ?""", (status, key))
+        finally:
+            self.db.execute("COMMIT")
+        return key
+
+    def claim(self, worker):
+        """Mark the oldest queued job, or else a stale running one, as running
+        and return it, or None"""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("""SELECT key, request FROM jobs
+                                     WHERE status = 'queued'
+                                     ORDER BY submitted LIMIT 1""").fetchone()
+            if row is None:
+                for key, request, status, other, lease in self.db.execute(
+                        """SELECT key, request, status, worker, lease FROM jobs
+                           WHERE status = 'running'
+                           ORDER BY started""").fetchall():
+                    if self._stale(status, other, lease, now):
+                        row = key, request
+                        break
+            if row is not None:
+                self.db.execute("""UPDATE jobs SET status = 'running',
+                                   started = ?, worker = ?, lease = ?
+                                   WHERE key = ?""",
+                                (now, worker, now + self.lease, row[0]))
+        finally:
+            self.db.execute("COMMIT")
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def renew(self, key, worker):
+        """Extend the lease of a job worker is still running"""
+        self.db.execute("""UPDATE jobs SET lease = ? WHERE key = ? AND
+                           worker = ? AND status = 'running'""",
+                        (time.time() + self.lease, key, worker))
+
+    def finish(self, key, timings=None, error=None):
+        self.db.execute("""UPDATE jobs SET status = ?, finished = ?,
+                           timings = ?, error = ? WHERE key = ?""",
+                        ("failed" if error else "done", time.time(),
+                         json.dumps(timings), error, key))
+
+    def status(self, key):
+        row = self.db.execute("""SELECT status, requests, submitted, started,
+                                 finished, worker, timings, error, lease
+                                 FROM jobs WHERE key = ?""", (key,)).fetchone()
+        if row is None:
+            return None
+        fields = ["status", "requests", "submitted", "started", "finished",
+                  "worker", "timings", "error", "lease"]
+        status = dict(zip(fields, row))
+        status["timings"] = json.loads(status["timings"] or "null")
+        status["result"] = self.result(key)
+        return status
+
+    def counts(self):
+        return dict(self.db.execute("""SELECT status, COUNT(*) FROM jobs
+                                       GROUP BY status""").fetchall())
+
+
+def runRequest(request, outdir):
+    """Build and export one normalized request into outdir, returns timings"""
+    timings = {}
+    start = time.time()
+    parts = buildParts(request["parts"], request["parameters"])
+    timings["construct"] = time.time() - start
+    for name, seconds in _exportParts(parts, request["formats"], outdir):
+        timings[name] = seconds
+    timings["total"] = time.time() - start
+    return timings
+
+
+def _heartbeat(path, store, key, worker, stop):
+    queue = BuildQueue(path, store)
+    while not stop.wait(queue.lease/3):
+        queue.renew(key, worker)
+
+
+def _queueWorker(path, store, drain, vitamins=None):
+    _useVitaminTable(vitamins)
+    queue = BuildQueue(path, store)
+    worker = "%s:%d" % (socket.gethostname(), os.getpid())
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            if drain:
+                return
+            time.sleep(0.5)
+            continue
+        key, request = job
+        result = queue.result(key)
+        partial = "%s.%d.tmp" % (result, os.getpid())
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat,
+                                     args=(path, store, key, worker, stop))
+        heartbeat.daemon = True
+        heartbeat.start()
+        try:
+            timings = runRequest(request, partial)
+            with open(os.path.join(partial, "timings.json"), "w") as f:
+                json.dump(timings, f, indent=1, sort_keys=True)
+            if os.path.isdir(result):
+                shutil.rmtree(partial)
+            else:
+                os.rename(partial, result)
+        except Exception as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            queue.finish(key, error="%s: %s" % (type(e).__name__, e))
+            continue
+        finally:
+            stop.set()
+            heartbeat.join()
+        queue.finish(key, timings=timings)
+
+
+def serveQueue(path="queue.db", store="store", workers=1, drain=False,
+               interval=2, stream=sys.stdout):
+    """Run workers on the queue, reporting progress until they exit"""
+    BuildQueue(path, store)
+    pool = [multiprocessing.Process(target=_queueWorker,
+                                    args=(path, store, drain, _vitaminTable))
+            for i in range(workers)]
+    for process in pool:
+        process.start()
+    queue = BuildQueue(path, store)
+    last = None
+    while any(process.is_alive() for process in pool):
+        counts = queue.counts()
+        if counts != last:
+            stream.write(" ".join("%s %d" % item
+                                  for item in sorted(counts.items())) + "\n")
+            stream.flush()
+            last = counts
+        time.sleep(interval)
+    for process in pool:
+        process.join()
+    stream.write(" ".join("%s %d" % item
+                          for item in sorted(queue.counts().items())) + "\n")
+
+
+def _parseParameter(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE, got %r" % text)
+    if key not in DEFAULT_PARAMETERS:
+        raise argparse.ArgumentTypeError("unknown parameter %r" % key)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return key, value
+
+
+def _regress(args, names, parameters):
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failed = 0
+    resolution = 24 if args.resolution is None else args.resolution
+    for name, current in fingerprintParts(names, parameters, resolution,
+                                          args.jobs):
+        if args.update_baseline:
+            baseline[name] = current
+            print("%s %s" % (name, current["hash"]))
+            continue
+        if name not in baseline:
+            print("%s: no baseline" % name)
+            failed += 1
+            continue
+        differences = compareFingerprints(baseline[name], current)
+        print("%s: %s" % (name, "changed" if differences else "ok"))
+        for difference in differences:
+            print("  " + difference)
+        failed += bool(differences)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build CoreBotOne parts")
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help="parts to build, one of %s "
+                             "(default: all but calibration)" %
+                             ", ".join(PART_ORDER))
+    parser.add_argument("-D", dest="parameters", action="append", default=[],
+                        type=_parseParameter, metavar="NAME=VALUE",
+                        help="override a parameter (%s)" %
+                             ", ".join(sorted(DEFAULT_PARAMETERS)))
+    parser.add_argument("-f", "--format", dest="formats", action="append",
+                        choices=sorted(EXPORTERS),
+                        help="output format, may be repeated "
+                             "(default: textcad)")
+    parser.add_argument("-o", "--outdir", default=".",
+                        help="output directory (default: .)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of parts built in parallel")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="print what would be built and exit")
+    parser.add_argument("--graph", action="store_true",
+                        help="print the build graph and exit")
+    parser.add_argument("--frame", action="store_true",
+                        help="print the frame cut list and bill of materials")
+    parser.add_argument("--build-volume", type=float, nargs=3,
+                        default=[150, 150, 200], metavar=("X", "Y", "Z"),
+                        help="build volume for --frame (default: 150 150 200)")
+    parser.add_argument("--variants", metavar="FILE",
+                        help="with --frame, read variants as JSON lines from "
+                             "FILE ('-' for stdin)")
+    parser.add_argument("--frame-format", choices=["csv", "json"],
+                        default="csv", help="--frame output format")
+    parser.add_argument("--queue", metavar="DB", default="queue.db",
+                        help="build queue database (default: queue.db)")
+    parser.add_argument("--store", default="store",
+                        help="build result store (default: store)")
+    parser.add_argument("--submit", action="store_true",
+                        help="queue the selected parts and print the job key")
+    parser.add_argument("--serve", action="store_true",
+                        help="run -j workers on the queue")
+    parser.add_argument("--drain", action="store_true",
+                        help="with --serve, exit once the queue is empty")
+    parser.add_argument("--status", metavar="KEY",
+                        help="print the status of a queued job")
+    parser.add_argument("--sweep", metavar="FILE",
+                        help="run the variants in FILE ('-' for stdin), one "
+                             "JSON object per line with optional id, parts, "
+                             "parameters and formats")
+    parser.add_argument("--sweep-out", default="-", metavar="FILE",
+                        help="where --sweep writes its JSON lines "
+                             "(default: stdout)")
+    parser.add_argument("--max-variants", type=int, default=50,
+                        help="variants per sweep worker before it is "
+                             "replaced (default: 50)")
+    parser.add_argument("--max-rss", type=float, metavar="MB",
+                        help="replace a sweep worker once its resident set "
+                             "exceeds MB")
+    parser.add_argument("--memory-limit", type=float, metavar="MB",
+                        help="hard address space limit per sweep worker")
+    parser.add_argument("--regress", action="store_true",
+                        help="compare part fingerprints against the baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write part fingerprints to the baseline")
+    parser.add_argument("--baseline", default="regression.json",
+                        help="baseline file (default: regression.json)")
+    parser.add_argument("--resolution", type=int,
+                        help="voxels per axis for fingerprints (default: 24, "
+                             "0 with --sweep, which skips the volume)")
+    parser.add_argument("--no-vitamin-table", action="store_true",
+                        help="look up vitamins in magpie instead of %s" %
+                             os.path.basename(VITAMIN_TABLE))
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("-j must be at least 1")
+    names = args.parts or DEFAULT_PARTS
+    formats = args.formats or ["textcad"]
+    parameters = dict(args.parameters)
+    try:
+        order = buildOrder(names)
+    except KeyError as e:
+        parser.error(e.args[0])
+    try:
+        createExporters(names[0], formats, args.outdir)
+    except ValueError as e:
+        parser.error(e)
+    # loaded once here and handed to every worker process
+    if not (args.no_vitamin_table or args.submit or args.status or
+            args.graph or args.dry_run):
+        loadVitaminTable()
+
+    if args.frame:
+        if args.variants:
+            source = sys.stdin if args.variants == "-" else open(args.variants)
+            rows = variantRows((json.loads(line) for line in source
+                                if line.strip()), parameters)
+        else:
+            rows = frameRows(CoreBotConfig(buildVolume=args.build_volume),
+                             parameters)
+        try:
+            writeRows(rows, sys.stdout, args.frame_format)
+        except ValueError as e:
+            parser.error(e)
+        return 0
+    if args.sweep:
+        source = sys.stdin if args.sweep == "-" else open(args.sweep)
+        out = sys.stdout if args.sweep_out == "-" else open(args.sweep_out, "w")
+        megabyte = 1024*1024
+        memoryLimit = args.memory_limit and int(args.memory_limit*megabyte)
+        try:
+            checkMemoryLimit(memoryLimit)
+        except ValueError as e:
+            parser.error(e)
+        summary = runSweep((json.loads(line) for line in source
+                            if line.strip()),
+                           out,
+                           workers=args.jobs,
+                           maxVariants=args.max_variants,
+                           maxRss=args.max_rss and args.max_rss*megabyte,
+                           memoryLimit=memoryLimit,
+                           resolution=args.resolution or 0,
+                           outdir=args.outdir)
+        sys.stderr.write(" ".join("%s %s" % item
+                                  for item in sorted(summary.items())) + "\n")
+        return 1 if summary["failed"] else 0
+    if args.submit:
+        queue = BuildQueue(args.queue, args.store)
+        print(queue.submit({"parts": names, "parameters": parameters,
+                            "formats": formats}))
+        return 0
+    if args.status:
+        status = BuildQueue(args.queue, args.store).status(args.status)
+        print(json.dumps(status, indent=1, sort_keys=True))
+        return 0 if status else 1
+    if args.serve:
+        serveQueue(args.queue, args.store, args.jobs, args.drain)
+        return 0
+    if args.graph:
+        for name in order:
+            print("%s: %s" % (name,
+                              " ".join(sorted(PARTS[name].requires.values()))))
+        return 0
+    if args.dry_run:
+        for name in order:
+            action = "export" if name in names else "construct"
+            print("%s %s" % (action, name))
+        for name in names:
+            for exporter in createExporters(name, formats, args.outdir):
+                for path in exporter.outputs():
+                    print("  " + path)
+        return 0
+
+    if args.regress or args.update_baseline:
+        return _regress(args, args.parts or PART_ORDER, parameters)
+    start = time.time()
+    parts = buildParts(names, parameters)
+    print("construct %.2fs" % (time.time() - start))
+    if args.jobs > 1 and len(parts) > 1:
+        # every part is constructed once, here; the workers only export
+        pool = multiprocessing.Pool(min(args.jobs, len(parts)),
+                                    _useBuiltParts, (_vitaminTable, parts))
+        results = pool.imap_unordered(_exportJob, [(name, formats, args.outdir)
+                                                   for name in parts])
+    else:
+        pool = None
+        results = _exportParts(parts, formats, args.outdir)
+    for name, seconds in results:
+        print("%s %.2fs" % (name, seconds))
+    if pool is not None:
+        pool.close()
+        pool.join()
+    return 0
+
+
 if __name__ == "__main__":
-    #Config
-    stepper = "GenericNEMA17"
-    linearBearing = "LM8UU"
-    screw = "M3"
-    beltSize = "GT2"
-    beltWidth = 6
-    woodWidth = 38.3
-    ybearing = YBearingMount(rodDiameter=8,
-                             mountLength=woodWidth,
-                             stepper=stepper,
-                             beltSize=beltSize,
-                             bearingSize="625zz",
-                             beltWidth=beltWidth,
-                             holeDiameter=3.5)
-    motorMount = MotorMount(rodDiameter=8,
-                            mountLength=woodWidth,
-                            stepper=stepper,
-                            beltSize=beltSize,
-                            bearingSize="625zz",
-                            beltWidth=beltWidth,
-                            holeDiameter=3.5)
-    xcar = XCarriage(linearBallBearing=linearBearing,
-                     screw=screw,
-                     beltSize=belt,
-                     beltWidth=beltWidth
-                     )
-    beltRetainer = BeltRetainer(yBearingMount=ybearing, height=2)
-    beltClamp = BeltClamp(xCarriage=xcar, thickness=4)
-    ycar = YCarriage(xCarriage=xcar,
-                     bearingMount=ybearing)
-    ycarPlate = YCarriagePlate(yCarriage=ycar)
-    drillTemplate = DrillTemplate(yRodMount=YRodMount())
-
-    def textcadArgs(name):
-        cmd = "textcad -o ./scad/" + name + ".scad ./json/" + name + ".json"
-        return cmd.split()
-
-    utility.export(xcar, "./json/xcar.json")
-    subprocess.Popen(textcadArgs("xcar"))
-    utility.export(ybearing, "./json/ybearing.json")
-    subprocess.Popen(textcadArgs("ybearing"))
-    utility.export(beltRetainer, "./json/belt_retainer.json")
-    subprocess.Popen(textcadArgs("belt_retainer"))
-    utility.export(motorMount, "./json/motor_mount.json")
-    subprocess.Popen(textcadArgs("motor_mount"))
-    utility.export(beltClamp, "./json/belt_clamp.json")
-    subprocess.Popen(textcadArgs("belt_clamp"))
-    utility.export(ycar, "./json/ycar.json")
-    subprocess.Popen(textcadArgs("ycar"))
-    utility.export(drillTemplate, "./json/drill_template.json")
-    subprocess.Popen(textcadArgs("drill_template"))
-    utility.export(ycarPlate, "./json/ycar_plate.json")
-    subprocess.Popen(textcadArgs("ycar_plate"))
+    sys.exit(main())
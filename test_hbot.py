@@ -0,0 +1,320 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+import copy
+import io
+import json
+import os
+import pickle
+import shutil
+import socket
+import subprocess
+import sys
+
+import pytest
+
+import hbot
+
+try:
+    import textcad
+    import magpie
+except ImportError:
+    textcad = magpie = None
+
+requiresCad = pytest.mark.skipif(magpie is None,
+                                 reason="needs textcad and magpie")
+
+
+def _fingerprint(nodes, hash="a", bbox=None, volume=None):
+    return {"hash": hash, "nodes": nodes, "bbox": bbox, "volume": volume,
+            "voxels": None}
+
+
+def test_compareFingerprints_same_hash():
+    fp = _fingerprint({"0": ["Cube", "x"]})
+    assert hbot.compareFingerprints(fp, dict(fp)) == []
+
+
+def test_compareFingerprints_reports_deepest_changes():
+    old = _fingerprint({"0": ["Union", "a"], "0/0": ["Cube", "b"],
+                        "0/1": ["Difference", "c"], "0/1/0": ["Hole", "d"],
+                        "0/2": ["Cube", "e"]}, hash="1", volume=2.0)
+    new = _fingerprint({"0": ["Union", "A"], "0/0": ["Cube", "b"],
+                        "0/1": ["Difference", "C"], "0/1/0": ["Hole", "D"],
+                        "0/3": ["Cone", "f"]}, hash="2", volume=3.0)
+    assert hbot.compareFingerprints(old, new) == [
+        "volume: 2.0 -> 3.0",
+        "changed 0/1/0 Hole",
+        "added 0/3 Cone",
+        "removed 0/2 Cube",
+    ]
+
+
+def test_BuildQueue_dedup(tmpdir):
+    queue = hbot.BuildQueue(str(tmpdir.join("q.db")), str(tmpdir.join("s")))
+    key = queue.submit({"parts": ["xcar", "ycar"], "formats": ["scad"]})
+    again = queue.submit({"parts": ["ycar", "xcar", "ycar"],
+                          "formats": ["scad"],
+                          "parameters": {"screw": "M3"}})
+    assert again == key
+    assert queue.status(key)["requests"] == 2
+    assert queue.counts() == {"queued": 1}
+
+
+def test_BuildQueue_claim(tmpdir):
+    queue = hbot.BuildQueue(str(tmpdir.join("q.db")), str(tmpdir.join("s")))
+    first = queue.submit({"parts": ["xcar"]})
+    second = queue.submit({"parts": ["ycar"]})
+    worker = "%s:%d" % (socket.gethostname(), os.getpid())
+    assert queue.claim(worker)[0] == first
+    assert queue.claim(worker)[0] == second
+    assert queue.claim(worker) is None
+    assert queue.status(first)["status"] == "running"
+
+
+def test_BuildQueue_reclaims_stale_jobs(tmpdir):
+    queue = hbot.BuildQueue(str(tmpdir.join("q.db")), str(tmpdir.join("s")))
+    key = queue.submit({"parts": ["xcar"]})
+    queue.claim("%s:%d" % (socket.gethostname(), os.getpid()))
+    queue.db.execute("UPDATE jobs SET lease = 0")
+    assert queue.claim("other")[0] == key
+    assert queue.status(key)["worker"] == "other"
+    # a worker on another host is only given up once its lease runs out
+    assert queue.claim("again") is None
+    queue.db.execute("UPDATE jobs SET lease = 0")
+    queue.submit({"parts": ["xcar"]})
+    assert queue.status(key)["status"] == "queued"
+
+
+def test_BuildQueue_rebuilds_removed_results(tmpdir):
+    queue = hbot.BuildQueue(str(tmpdir.join("q.db")), str(tmpdir.join("s")))
+    key = queue.submit({"parts": ["xcar"]})
+    queue.claim("worker")
+    os.makedirs(queue.result(key))
+    queue.finish(key, timings={})
+    queue.submit({"parts": ["xcar"]})
+    assert queue.status(key)["status"] == "done"
+    shutil.rmtree(queue.result(key))
+    queue.submit({"parts": ["xcar"]})
+    assert queue.status(key)["status"] == "queued"
+
+
+def test_runSweep_rejects_no_workers():
+    with pytest.raises(ValueError):
+        hbot.runSweep([{"parts": ["xcar"]}], io.StringIO(), workers=0)
+    with pytest.raises(SystemExit):
+        hbot.main(["--sweep", "-", "-j", "0"])
+
+
+@requiresCad
+def test_runSweep_recycles_workers():
+    stream = io.StringIO()
+    variants = [{"parts": ["belt_retainer"],
+                 "parameters": {"beltWidth": width}} for width in [5, 6, 7]]
+    summary = hbot.runSweep(variants, stream, workers=1, maxVariants=1)
+    rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert sorted(row["id"] for row in rows) == [0, 1, 2]
+    assert len(set(row["worker"] for row in rows)) == 3
+    assert summary["done"] == 3
+    assert summary["recycled"] == 3
+    assert rows[0]["parts"]["belt_retainer"]["volume"] is None
+
+
+def test_Transform_copy_and_pickle():
+    transform = hbot.Transform([1, 2, 3], [1, 0, 0], 90)
+    assert copy.copy(transform) is transform
+    assert copy.deepcopy([transform])[0] is transform
+    again = pickle.loads(pickle.dumps(transform))
+    assert again == transform
+    assert again.location == (1, 2, 3)
+    with pytest.raises(AttributeError):
+        again.angle = 0
+
+
+@requiresCad
+def test_HolePattern_placement():
+    from textcad import element
+    prototype = element.Cylinder(radius=1, height=2)
+    prototype.location = [5, 5, 5]
+    prototype.rotation.axis = [1, 0, 0]
+    prototype.rotation.angle = 90
+    pattern = hbot.HolePattern(prototype,
+                               [[0, 0, 0], [1, 2, 3]],
+                               [None, ([0, 0, 1], 45)])
+    copies = pattern.construction.elements
+    assert [list(c.location) for c in copies] == [[0, 0, 0], [1, 2, 3]]
+    assert [(list(c.rotation.axis), c.rotation.angle) for c in copies] == \
+        [([1, 0, 0], 90), ([0, 0, 1], 45)]
+    assert list(prototype.location) == [5, 5, 5]
+    assert prototype.rotation.angle == 90
+
+
+def test_createExporters_rejects_shared_outputs():
+    with pytest.raises(ValueError):
+        hbot.createExporters("xcar", ["scad", "textcad"])
+    hbot.createExporters("xcar", ["scad", "json", "stl"])
+
+
+@requiresCad
+def test_declared_vitamins_match_built_parts():
+    p = hbot._parameters()
+    parts = hbot.buildParts(sorted(hbot.MACHINE_PARTS), p)
+    for name, part in parts.items():
+        spec = hbot.PARTS[name]
+        kwargs = spec.kwargs(p)
+        declared = getattr(spec.cls, "VITAMINS", [])
+        sizes = set()
+        for value in vars(part).values():
+            for obj in [value] + list(vars(value).values()
+                                      if hasattr(value, "__dict__") else []):
+                size = getattr(obj, "size", None)
+                if not isinstance(size, list):
+                    sizes.add(size)
+        for kind, argument, count in declared:
+            if "." in kind:
+                assert kwargs[argument] in sizes, (name, kind)
+        nuts = sum(count for kind, argument, count in declared
+                   if kind in ["hardware.Nut", "hardware.LockNut"])
+        traps = sum(1 for event, info in hbot.walkTree(part)
+                    if event == "enter" and info.kind == "NutTrap")
+        assert traps == nuts, name
+
+
+@requiresCad
+def test_vitamin_table_is_recompiled_on_stamp_change(tmpdir):
+    path = str(tmpdir.join("vitamins.json"))
+    table = hbot.compileVitaminTable(path)
+    table["schema"] = "old"
+    table["vitamins"]["hardware.Nut"]["M3"]["width"] = -1
+    with open(path, "w") as f:
+        json.dump(table, f)
+    try:
+        vitamins = hbot.loadVitaminTable(path)
+        assert vitamins["hardware.Nut"]["M3"]["width"] > 0
+    finally:
+        hbot._vitaminTable = None
+
+
+@requiresCad
+def test_compileVitaminTable_skips_unknown_sizes(tmpdir):
+    sizes = {"bearing.BallBearing": ["625zz", "no-such-bearing"]}
+    table = hbot.compileVitaminTable(str(tmpdir.join("vitamins.json")), sizes)
+    assert list(table["vitamins"]["bearing.BallBearing"]) == ["625zz"]
+
+
+def _cubeMinusHole():
+    from textcad import element
+    cube = element.Cube(size=[1, 2, 3])
+    cube.location = [1, 2, 3]
+    return cube - element.Hole(radius=1, height=5)
+
+
+@requiresCad
+def test_ScadExporter_output(tmpdir):
+    hbot.exportPart(_cubeMinusHole(), "part", ["scad"], str(tmpdir))
+    scad = tmpdir.join("scad", "part.scad").read()
+    assert scad.startswith("// part\ndifference() {\n")
+    assert "translate([1, 2, 3]) cube(size=[1, 2, 3]);" in scad
+    assert scad.count("{") == scad.count("}")
+
+
+@requiresCad
+def test_JsonExporter_output(tmpdir):
+    hbot.exportPart(_cubeMinusHole(), "part", ["json"], str(tmpdir))
+    tree = json.loads(tmpdir.join("json", "part.tree.json").read())
+    assert tree["name"] == "part"
+    root = tree["root"]
+    assert root["kind"] == "Difference"
+    cube, hole = root["children"]
+    assert (cube["kind"], cube["path"]) == ("Cube", "0/0")
+    assert [row[3] for row in cube["matrix"]] == [1, 2, 3, 1]
+    assert hole["params"]["radius"] == 1
+
+
+@requiresCad
+def test_CalibrationPlate_one_coupon_per_tolerance():
+    tolerances = [0, 0.1, 0.2]
+    plate = hbot.CalibrationPlate(tolerances=tolerances)
+    kinds = [info.kind for event, info in hbot.walkTree(plate)
+             if event == "enter"]
+    assert kinds.count("NutTrap") == len(tolerances)
+    assert kinds.count("LinearBearingHolder") == len(tolerances)
+    traps = [info.node for event, info in hbot.walkTree(plate)
+             if event == "enter" and info.kind == "NutTrap"]
+    nut = plate.nut.width/2
+    assert [trap.construction.apothem - nut for trap in traps] == \
+        pytest.approx(tolerances)
+    assert [trap.location[0] for trap in traps] == \
+        [plate.pitch*(idx+0.5) for idx in range(len(tolerances))]
+
+
+@requiresCad
+def test_fingerprint_of_a_cube():
+    from textcad import element
+    cube = element.Cube(size=[2, 3, 4])
+    cube.location = [1, 2, 3]
+    fp = hbot.fingerprint(cube, resolution=4)
+    assert fp["bbox"] == [[1, 2, 3], [3, 5, 7]]
+    assert fp["volume"] == 24
+    assert hbot.fingerprint(cube, resolution=0)["volume"] is None
+    cut = element.Cube(size=[1, 3, 4])
+    cut.location = [1, 2, 3]
+    half = hbot.fingerprint(cube - cut, resolution=4)
+    assert half["bbox"] == fp["bbox"]
+    assert half["volume"] == 12
+    assert hbot.compareFingerprints(fp, half)[0] == "volume: 24.0 -> 12.0"
+
+
+@pytest.fixture
+def vitaminTable(monkeypatch):
+    monkeypatch.setattr(hbot, "_vitaminTable", {
+        "bearing.LinearBallBearing": {"LM8UU": {"length": 24,
+                                                "outerDiameter": 15}},
+        "motor.Stepper": {"GenericNEMA17": {"width": 42}},
+        "bearing.BallBearing": {"625zz": {"outerDiameter": 16}}})
+
+
+def test_frameDimensions(vitaminTable):
+    d = hbot.frameDimensions(hbot.CoreBotConfig(), {"woodWidth": 40})
+    carriage = 24*2 + 15*0.75
+    assert d["xRod"] == 150 + carriage + 15
+    assert d["yRod"] == 150 + carriage + 40*hbot.YRodMount.rodDepthFactor*2
+    assert d["innerZ"] == d["uprights"] == 200 + 42
+    assert d["yBeams"] == d["innerY"] + 80
+    assert d["belt"] % 2 == 0
+
+
+def test_frameRows(vitaminTable):
+    rows = list(hbot.frameRows(hbot.CoreBotConfig(), variant="a"))
+    assert set(row["variant"] for row in rows) == set(["a"])
+    assert [row["item"] for row in rows[:6]] == \
+        ["x rod", "y rod", "belt", "upright", "x beam", "y beam"]
+    vitamins = dict(((row["item"], row["size"]), row["count"])
+                    for row in rows if row["category"] == "vitamin")
+    assert vitamins[("LinearBallBearing", "LM8UU")] == 3 + 2*2 + 2
+    assert vitamins[("Stepper", "GenericNEMA17")] == 2 + 1
+    stream = io.StringIO()
+    hbot.writeRows(rows, stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == ",".join(hbot.FRAME_FIELDS)
+    assert len(lines) == len(rows) + 1
+
+
+def test_variantRows(vitaminTable):
+    variants = [{"id": "cli"},
+                {"id": "bad", "stepper": ["GenericNEMA17", "other", None]},
+                {"id": "own", "parameters": {"rodDiameter": 12}}]
+    rows = list(hbot.variantRows(variants, {"rodDiameter": 10}))
+    rods = dict((row["variant"], row["size"]) for row in rows
+                if row["item"] == "x rod")
+    assert rods == {"cli": "10mm", "own": "12mm"}
+    errors = [row for row in rows if row["category"] == "error"]
+    assert [row["variant"] for row in errors] == ["bad"]
+    assert errors[0]["item"].startswith("ValueError: the A and B steppers")
+
+
+def test_import_defers_heavy_modules():
+    code = ("import sys, hbot; print(' '.join(m for m in ['sqlite3', "
+            "'socket', 'multiprocessing', 'inspect', 'resource'] "
+            "if m in sys.modules))")
+    output = subprocess.check_output([sys.executable, "-c", code],
+                                     cwd=os.path.dirname(hbot.__file__))
+    assert output.strip() == b""